@@ -12,38 +12,288 @@ What You'll Learn:
 Prerequisites: You should know Flask basics (routes, templates, render_template)
 """
 
-from flask import Flask, render_template
+from flask import Flask, stream_template, g, request
+import itertools
+import os
+import queue
 import sqlite3  # Built-in Python library for SQLite database
+import time
 
 app = Flask(__name__)
 
 DATABASE = 'students.db'  # Database file name (will be created automatically if not exist)
 
+# How many idle connections the pool keeps open (override with DB_POOL_SIZE=10)
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 5))
+
+# Speed settings for every new connection (override with SQLITE_PRAGMA_PROFILE=default)
+app.config['SQLITE_PRAGMA_PROFILE'] = os.getenv('SQLITE_PRAGMA_PROFILE', 'fast')
+
+# Opt-in SQL tracing: Server-Timing headers + log of slow requests (SQL_TRACE=1)
+app.config['SQL_TRACE'] = os.getenv('SQL_TRACE', '0') == '1'
+app.config['SQL_SLOW_MS'] = float(os.getenv('SQL_SLOW_MS', 100))  # log requests with more DB time than this
+
+
+# =============================================================================
+# SQLITE PRAGMA PROFILES - applied once when a connection is opened
+# =============================================================================
+
+SQLITE_PRAGMA_PROFILES = {
+    'default': {},  # SQLite's own settings (rollback journal, fsync on every commit)
+    'fast': {
+        'journal_mode': 'WAL',    # readers no longer wait behind writers
+        'synchronous': 'NORMAL',  # fsync at checkpoints instead of every commit (safe with WAL)
+        'mmap_size': 268435456,   # read the file through 256 MB of memory-mapped I/O
+        'cache_size': -64000,     # ~64 MB page cache (negative value = size in KiB)
+        'temp_store': 'MEMORY',   # temp tables and sorts stay in RAM
+        'busy_timeout': 5000,     # wait up to 5 s for a lock instead of failing at once
+    },
+}
+
+if app.config['SQLITE_PRAGMA_PROFILE'] not in SQLITE_PRAGMA_PROFILES:  # fail at startup, not on the first connection
+    raise RuntimeError(f"SQLITE_PRAGMA_PROFILE={app.config['SQLITE_PRAGMA_PROFILE']!r} is unknown "
+                       f"(use {' or '.join(SQLITE_PRAGMA_PROFILES)})")
+
+
+def apply_pragmas(conn):
+    """Run the selected profile's PRAGMA statements on a new connection"""
+    profile = SQLITE_PRAGMA_PROFILES[app.config['SQLITE_PRAGMA_PROFILE']]
+    for name, value in profile.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def effective_pragmas(conn):
+    """Read back what SQLite is actually using (printed at startup)"""
+    return {
+        name: conn.execute(f'PRAGMA {name}').fetchone()[0]
+        for name in SQLITE_PRAGMA_PROFILES['fast']
+    }
+
 
 # =============================================================================
 # DATABASE HELPER FUNCTIONS
 # =============================================================================
 
-def get_db_connection():
-    """Create a connection to the database"""
-    conn = sqlite3.connect(DATABASE)  # Connect to database file
+_pool = queue.LifoQueue(maxsize=app.config['DB_POOL_SIZE'])  # Idle connections waiting to be reused
+
+
+def _open_connection():
+    """Create a brand-new connection to the database"""
+    factory = TracedConnection if app.config['SQL_TRACE'] else sqlite3.Connection  # TracedConnection times queries
+    conn = sqlite3.connect(DATABASE, check_same_thread=False, factory=factory)  # Pooled connections move between request threads
     conn.row_factory = sqlite3.Row  # This allows accessing columns by name (like dict)
-    return conn   #return conn means it will return something and any body can use that further init_db(), / , /add will use
+    apply_pragmas(conn)  # Speed settings (WAL, cache size, ...) - see SQLITE_PRAGMA_PROFILES
+    return conn
+
+
+def _is_healthy(conn):
+    """Health check: make sure a pooled connection still works"""
+    try:
+        conn.execute('SELECT 1')
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _checkout():
+    """Take a healthy idle connection from the pool, or open a new one"""
+    while True:
+        try:
+            conn = _pool.get_nowait()  # reuse an idle (already warm) connection
+        except queue.Empty:
+            return _open_connection()  # pool empty -> open a new one
+        if _is_healthy(conn):
+            return conn
+        # broken connection -> drop it and try the next one
+
+
+def get_db_connection():
+    """Get this request's database connection (borrowed from the pool)"""
+    if 'db' not in g:
+        g.db = _checkout()
+        if app.config['SQL_TRACE']:
+            _start_tracing(g.db)
+    return g.db   #return conn means it will return something and any body can use that further init_db(), / , /add will use
+
+
+@app.teardown_appcontext
+def return_db_connection(exception):
+    """Runs automatically after every request - gives the connection back to the pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        _release(conn)
+
+
+def _release(conn):
+    """Put a connection back in the pool (or close it if the pool is full)"""
+    conn.set_trace_callback(None)  # stop counting statements for the finished request
+
+    if conn.in_transaction:
+        conn.rollback()  # throw away anything that was not committed
+
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()  # pool is full -> really close it (so avoid memory fault)
+
+
+def release_after_stream(body):
+    """Streamed response: give the connection back once the body is sent, not at teardown.
+
+    Flask may run the teardown handlers before a streamed body is generated
+    (Flask 3.1 runs them when the view returns, then again after the stream),
+    and the template is still reading rows from this connection until the end.
+    """
+    conn = g.pop('db', None)  # teardown won't see it -> can't hand it to another request too early
+    stats = g.get('sql_stats')
+    g.streaming = True  # log_slow_request() leaves the logging to finish() as well
+    method, path = request.method, request.path
+
+    def finish():
+        if stats is not None:
+            _log_slow_request(stats, method, path)
+        if conn is not None:
+            _release(conn)
+
+    response = app.response_class(body)  # stream_template() returns a generator, not a Response
+    response.call_on_close(finish)  # the WSGI server calls this after the last chunk
+    return response
+
+
+# =============================================================================
+# SQL TRACING (opt-in) - statement count and DB time for each request
+# =============================================================================
+
+class TracedCursor(sqlite3.Cursor):
+    """sqlite3 cursor that times execute*() and fetch*() / iteration (used when SQL_TRACE is on)
+
+    SQLite only runs a SELECT as far as the first row in execute(); the rest of
+    the work happens while rows are fetched, so that time has to count too.
+    """
+
+    sql = None       # statement this cursor last ran
+    elapsed = 0.0    # seconds spent on that statement so far (execute + fetches)
+
+    def _timed(self, call, *args):
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            seconds = time.perf_counter() - started
+            self.elapsed += seconds
+            _record_timing(self.sql, seconds, self.elapsed)
+
+    def execute(self, sql, parameters=()):
+        self.sql, self.elapsed = sql, 0.0
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.sql, self.elapsed = sql, 0.0
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        self.sql, self.elapsed = sql_script, 0.0
+        return self._timed(super().executescript, sql_script)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+    def __next__(self):
+        return self._timed(super().__next__)  # "for row in cursor" steps SQLite here
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors are TracedCursors"""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def _count_statement(sql):
+    """Trace callback: SQLite calls this for every statement it runs (COMMITs and triggers too)"""
+    stats = g.get('sql_stats')
+    if stats is not None:
+        stats['statements'] += 1
+
+
+def _record_timing(sql, seconds, statement_seconds):
+    """Add one timed call; statement_seconds = everything spent on that statement so far"""
+    stats = g.get('sql_stats')
+    if stats is None or sql is None:
+        return
+    stats['db_time'] += seconds
+    if statement_seconds >= stats['slowest_time']:
+        stats['slowest_time'] = statement_seconds
+        stats['slowest_sql'] = ' '.join(sql.split())  # squash whitespace -> one log line
+
+
+def _start_tracing(conn):
+    g.sql_stats = {'statements': 0, 'db_time': 0.0, 'slowest_time': 0.0, 'slowest_sql': None}
+    conn.set_trace_callback(_count_statement)
+
+
+@app.after_request
+def add_server_timing(response):
+    """Expose the request's DB stats as Server-Timing (visible in browser dev tools)"""
+    stats = g.get('sql_stats')
+    if stats is None or response.is_streamed:
+        return response  # a streamed body hasn't been read from the DB yet - see release_after_stream()
+
+    response.headers['Server-Timing'] = (
+        f'db;dur={stats["db_time"] * 1000:.2f};desc="{stats["statements"]} statements", '
+        f'db-slowest;dur={stats["slowest_time"] * 1000:.2f}'
+    )
+    return response
+
+
+@app.teardown_request
+def log_slow_request(exception):
+    """Log requests that spent more than SQL_SLOW_MS in the database"""
+    stats = g.get('sql_stats')
+    if stats is None or g.get('streaming'):
+        return  # streamed responses are logged by release_after_stream() when they finish
+    _log_slow_request(stats, request.method, request.path)
+
+
+def _log_slow_request(stats, method, path):
+    db_ms = stats['db_time'] * 1000
+    if db_ms > app.config['SQL_SLOW_MS']:
+        app.logger.warning(
+            'Slow request %s %s: %d statements, %.1f ms in DB, slowest %.1f ms: %s',
+            method, path, stats['statements'], db_ms,
+            stats['slowest_time'] * 1000, stats['slowest_sql']
+        )
 
 
 def init_db():
     """Create the table if it doesn't exist"""
-    conn = get_db_connection()
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS students (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            course TEXT NOT NULL
-        )
-    ''')  # SQL command to create table with 4 columns
-    conn.commit()  # Save changes to database
-    conn.close()  # Close connection (so avoid memory fault)
+    with app.app_context():  # get_db_connection() needs an app context (no request yet)
+        conn = get_db_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS students (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                course TEXT NOT NULL
+            )
+        ''')  # SQL command to create table with 4 columns
+        conn.commit()  # Save changes to database
+        print(f"SQLite pragmas ({app.config['SQLITE_PRAGMA_PROFILE']}):", effective_pragmas(conn))
 
 
 # =============================================================================
@@ -53,22 +303,29 @@ def init_db():
 @app.route('/')
 def index():
     """Home page - Display all students from database"""
-    conn = get_db_connection()  # Step 1: Connect to database (open the database)
-    students = conn.execute('SELECT * FROM students').fetchall()  # Step 2: Get all rows
-    conn.close()  # Step 3: Close connection
-    return render_template('index.html', students=students)
+    conn = get_db_connection()  # Step 1: Get a connection (borrowed from the pool)
+    cursor = conn.execute('SELECT * FROM students')  # Step 2: Run the query (rows are read lazily)
+    body = stream_template('index.html', students=lazy_rows(cursor))  # Step 3: Send HTML while reading rows
+    return release_after_stream(body)  # keep the connection until the last row is sent
+
+
+def lazy_rows(cursor):
+    """Rows one by one from the cursor (instead of fetchall()), or [] if there are none"""
+    first = cursor.fetchone()  # peek, so {% if students %} in the template still works
+    if first is None:
+        return []
+    return itertools.chain([first], cursor)
 
 
 @app.route('/add')
 def add_sample_student():
     """Add a sample student to database (for testing)"""
-    conn = get_db_connection()   # Step 1: Connect to database (open the database)
+    conn = get_db_connection()   # Step 1: Get a connection (borrowed from the pool)
     conn.execute(
         'INSERT INTO students (name, email, course) VALUES (?, ?, ?)',
         ('Durgesh Hyalij', 'durgesh@example.com', 'Python')  # ? are placeholders (safe from SQL injection)
     )
     conn.commit()  # Don't forget to commit!
-    conn.close()    # Step 3: Close connection
     return 'Student added! <a href="/">Go back to home</a>'
 
 
@@ -93,13 +350,20 @@ if __name__ == '__main__':
 #
 # 2. Connection Flow:
 #    connect → execute SQL → commit (if changing data) → close
+#    (here "connect" borrows from a pool and "close" returns to it, so the
+#    same warm connections are reused across requests)
 #
 # 3. SQL Commands Used:
 #    - CREATE TABLE: Define table structure
 #    - SELECT * FROM: Get all data
 #    - INSERT INTO: Add new data
 #
-# 4. row_factory = sqlite3.Row:
+# 4. stream_template() + a lazy cursor:
+#    - fetchall() + render_template() build the whole page in memory first
+#    - stream_template() sends the HTML in pieces while rows are read,
+#      so the first bytes arrive at once even with a million students
+#
+# 5. row_factory = sqlite3.Row:
 #    - Without this: row[0], row[1] (access by index)
 #    - With this: row['name'], row['email'] (access by column name)
 #
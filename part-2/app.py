@@ -14,33 +14,377 @@ What You'll Learn:
 Prerequisites: Complete part-1 first
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, stream_template, request, redirect, url_for, flash, g, Response, stream_with_context, get_flashed_messages
+import csv
+import io
+import itertools
+import os
+import queue
 import sqlite3
+import time
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'  # Required for flash messages
 
 DATABASE = 'students.db'
 
+# How many idle connections the pool keeps open (override with DB_POOL_SIZE=10)
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 5))
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)  #connect databasefile  
-    conn.row_factory = sqlite3.Row  
+# Speed settings for every new connection (override with SQLITE_PRAGMA_PROFILE=default)
+app.config['SQLITE_PRAGMA_PROFILE'] = os.getenv('SQLITE_PRAGMA_PROFILE', 'fast')
+
+# Opt-in SQL tracing: Server-Timing headers + log of slow requests (SQL_TRACE=1)
+app.config['SQL_TRACE'] = os.getenv('SQL_TRACE', '0') == '1'
+app.config['SQL_SLOW_MS'] = float(os.getenv('SQL_SLOW_MS', 100))  # log requests with more DB time than this
+
+
+# =============================================================================
+# SQLITE PRAGMA PROFILES - applied once when a connection is opened
+# =============================================================================
+
+SQLITE_PRAGMA_PROFILES = {
+    'default': {},  # SQLite's own settings (rollback journal, fsync on every commit)
+    'fast': {
+        'journal_mode': 'WAL',    # readers no longer wait behind writers
+        'synchronous': 'NORMAL',  # fsync at checkpoints instead of every commit (safe with WAL)
+        'mmap_size': 268435456,   # read the file through 256 MB of memory-mapped I/O
+        'cache_size': -64000,     # ~64 MB page cache (negative value = size in KiB)
+        'temp_store': 'MEMORY',   # temp tables and sorts stay in RAM
+        'busy_timeout': 5000,     # wait up to 5 s for a lock instead of failing at once
+    },
+}
+
+if app.config['SQLITE_PRAGMA_PROFILE'] not in SQLITE_PRAGMA_PROFILES:  # fail at startup, not on the first connection
+    raise RuntimeError(f"SQLITE_PRAGMA_PROFILE={app.config['SQLITE_PRAGMA_PROFILE']!r} is unknown "
+                       f"(use {' or '.join(SQLITE_PRAGMA_PROFILES)})")
+
+
+def apply_pragmas(conn):
+    """Run the selected profile's PRAGMA statements on a new connection"""
+    profile = SQLITE_PRAGMA_PROFILES[app.config['SQLITE_PRAGMA_PROFILE']]
+    for name, value in profile.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def effective_pragmas(conn):
+    """Read back what SQLite is actually using (printed at startup)"""
+    return {
+        name: conn.execute(f'PRAGMA {name}').fetchone()[0]
+        for name in SQLITE_PRAGMA_PROFILES['fast']
+    }
+
+
+# =============================================================================
+# CONNECTION POOL - reuse warm connections instead of connect-per-request
+# =============================================================================
+
+_pool = queue.LifoQueue(maxsize=app.config['DB_POOL_SIZE'])  # LIFO -> most recently used (warmest) first
+
+
+def _open_connection():
+    # check_same_thread=False: a pooled connection may be handed to a different
+    # request thread later (only ever one request uses it at a time)
+    factory = TracedConnection if app.config['SQL_TRACE'] else sqlite3.Connection
+    conn = sqlite3.connect(DATABASE, check_same_thread=False, factory=factory)
+    conn.row_factory = sqlite3.Row
+    apply_pragmas(conn)  # connect hook: WAL, cache size, ... (see SQLITE_PRAGMA_PROFILES)
     return conn
 
 
-def init_db():
-    conn = get_db_connection()
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS students (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            course TEXT NOT NULL
+def _is_healthy(conn):
+    """Health check: make sure a pooled connection still works"""
+    try:
+        conn.execute('SELECT 1')
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _checkout():
+    """Take a healthy idle connection from the pool, or open a new one"""
+    while True:
+        try:
+            conn = _pool.get_nowait()  # reuse an idle connection
+        except queue.Empty:
+            return _open_connection()  # pool empty -> open a new one
+        if _is_healthy(conn):
+            return conn
+        # broken connection -> drop it and try the next one
+
+
+def get_db_connection():
+    """Borrow a connection for this request (same one on every call)"""
+    if 'db' not in g:
+        g.db = _checkout()
+        if app.config['SQL_TRACE']:
+            _start_tracing(g.db)
+    return g.db
+
+
+@app.teardown_appcontext
+def return_db_connection(exception):
+    """Give the connection back to the pool when the request ends"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        _release(conn)
+
+
+def _release(conn):
+    """Put a connection back in the pool (or close it if the pool is full)"""
+    conn.set_trace_callback(None)  # stop counting once the request is over
+
+    if conn.in_transaction:
+        conn.rollback()  # never hand out a connection with half-done changes
+
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()  # pool already has DB_POOL_SIZE idle connections
+
+
+def release_after_stream(body):
+    """Streamed response: give the connection back once the body is sent, not at teardown.
+
+    Flask may run the teardown handlers before a streamed body is generated
+    (Flask 3.1 runs them when the view returns, then again after the stream),
+    and the template is still reading rows from this connection until the end.
+    """
+    conn = g.pop('db', None)  # teardown won't see it -> can't hand it to another request too early
+    stats = g.get('sql_stats')
+    g.streaming = True  # log_slow_request() leaves the logging to finish() as well
+    method, path = request.method, request.path
+
+    def finish():
+        if stats is not None:
+            _log_slow_request(stats, method, path)
+        if conn is not None:
+            _release(conn)
+
+    response = app.response_class(body)  # stream_template() returns a generator, not a Response
+    response.call_on_close(finish)  # the WSGI server calls this after the last chunk
+    return response
+
+
+# =============================================================================
+# SQL TRACING (opt-in) - statement count and DB time for each request
+# =============================================================================
+
+class TracedCursor(sqlite3.Cursor):
+    """sqlite3 cursor that times execute*() and fetch*() / iteration (used when SQL_TRACE is on)
+
+    SQLite only runs a SELECT as far as the first row in execute(); the rest of
+    the work happens while rows are fetched, so that time has to count too.
+    """
+
+    sql = None       # statement this cursor last ran
+    elapsed = 0.0    # seconds spent on that statement so far (execute + fetches)
+
+    def _timed(self, call, *args):
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            seconds = time.perf_counter() - started
+            self.elapsed += seconds
+            _record_timing(self.sql, seconds, self.elapsed)
+
+    def execute(self, sql, parameters=()):
+        self.sql, self.elapsed = sql, 0.0
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.sql, self.elapsed = sql, 0.0
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        self.sql, self.elapsed = sql_script, 0.0
+        return self._timed(super().executescript, sql_script)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+    def __next__(self):
+        return self._timed(super().__next__)  # "for row in cursor" steps SQLite here
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors are TracedCursors"""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def _count_statement(sql):
+    """Trace callback: SQLite calls this for every statement it runs (COMMITs and triggers too)"""
+    stats = g.get('sql_stats')
+    if stats is not None:
+        stats['statements'] += 1
+
+
+def _record_timing(sql, seconds, statement_seconds):
+    """Add one timed call; statement_seconds = everything spent on that statement so far"""
+    stats = g.get('sql_stats')
+    if stats is None or sql is None:
+        return
+    stats['db_time'] += seconds
+    if statement_seconds >= stats['slowest_time']:
+        stats['slowest_time'] = statement_seconds
+        stats['slowest_sql'] = ' '.join(sql.split())  # squash whitespace -> one log line
+
+
+def _start_tracing(conn):
+    g.sql_stats = {'statements': 0, 'db_time': 0.0, 'slowest_time': 0.0, 'slowest_sql': None}
+    conn.set_trace_callback(_count_statement)
+
+
+@app.after_request
+def add_server_timing(response):
+    """Expose the request's DB stats as Server-Timing (visible in browser dev tools)"""
+    stats = g.get('sql_stats')
+    if stats is None or response.is_streamed:
+        return response  # a streamed body hasn't been read from the DB yet - see release_after_stream()
+
+    response.headers['Server-Timing'] = (
+        f'db;dur={stats["db_time"] * 1000:.2f};desc="{stats["statements"]} statements", '
+        f'db-slowest;dur={stats["slowest_time"] * 1000:.2f}'
+    )
+    return response
+
+
+@app.teardown_request
+def log_slow_request(exception):
+    """Log requests that spent more than SQL_SLOW_MS in the database"""
+    stats = g.get('sql_stats')
+    if stats is None or g.get('streaming'):
+        return  # streamed responses are logged by release_after_stream() when they finish
+    _log_slow_request(stats, request.method, request.path)
+
+
+def _log_slow_request(stats, method, path):
+    db_ms = stats['db_time'] * 1000
+    if db_ms > app.config['SQL_SLOW_MS']:
+        app.logger.warning(
+            'Slow request %s %s: %d statements, %.1f ms in DB, slowest %.1f ms: %s',
+            method, path, stats['statements'], db_ms,
+            stats['slowest_time'] * 1000, stats['slowest_sql']
         )
+
+
+def init_db():
+    with app.app_context():
+        conn = get_db_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS students (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                course TEXT NOT NULL
+            )
+        ''')
+        create_search_index(conn)
+        create_email_index(conn)
+        conn.commit()
+        print(f"SQLite pragmas ({app.config['SQLITE_PRAGMA_PROFILE']}):", effective_pragmas(conn))
+
+
+def create_email_index(conn):
+    """Migration: remove duplicate emails once, then make students.email UNIQUE"""
+    has_index = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_students_email'"
+    ).fetchone() is not None
+    if has_index:
+        return
+
+    duplicates = conn.execute(
+        'SELECT email, COUNT(*) AS copies FROM students GROUP BY email HAVING COUNT(*) > 1'
+    ).fetchall()
+    if duplicates:
+        print(f'Found {len(duplicates)} duplicate email(s), keeping the oldest student for each:')
+        for row in duplicates:
+            print(f"  {row['email']} ({row['copies']} rows)")
+        conn.execute('DELETE FROM students WHERE id NOT IN (SELECT MIN(id) FROM students GROUP BY email)')
+
+    conn.execute('CREATE UNIQUE INDEX idx_students_email ON students(email)')
+
+
+# =============================================================================
+# FULL-TEXT SEARCH (FTS5) - index over name, email and course
+# =============================================================================
+
+SEARCH_LIMIT = 50  # Max results shown by /search (best matches first)
+
+
+def create_search_index(conn):
+    """Create the FTS5 table + triggers that keep it in sync with students"""
+    is_new = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'students_fts'"
+    ).fetchone() is None
+
+    # External-content table: stores only the index, the rows stay in students
+    conn.executescript('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            name, email, course,
+            content='students', content_rowid='id'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts(rowid, name, email, course)
+            VALUES (new.id, new.name, new.email, new.course);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, name, email, course)
+            VALUES ('delete', old.id, old.name, old.email, old.course);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, name, email, course)
+            VALUES ('delete', old.id, old.name, old.email, old.course);
+            INSERT INTO students_fts(rowid, name, email, course)
+            VALUES (new.id, new.name, new.email, new.course);
+        END;
     ''')
-    conn.commit()
-    conn.close()
+
+    if is_new:
+        rebuild_search_index(conn)  # existing database -> index the rows already there
+
+
+def rebuild_search_index(conn):
+    """Re-index every row of students from scratch"""
+    conn.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
+
+
+@app.cli.command('rebuild-search')
+def rebuild_search_command():
+    """Rebuild the full-text search index (run: flask --app app rebuild-search)"""
+    init_db()
+    with app.app_context():
+        conn = get_db_connection()
+        rebuild_search_index(conn)
+        conn.commit()
+    print('Search index rebuilt!')
+
+
+def fts_query(text):
+    """Turn user text into a safe FTS5 prefix query: 'dur pyth' -> '"dur"* "pyth"*'"""
+    terms = [word.replace('"', '""') for word in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms)
 
 
 # =============================================================================
@@ -74,31 +418,24 @@ def add_student():
 
         conn = get_db_connection()
 
-        # 5️⃣ DUPLICATE EMAIL VALIDATION (IMPORTANT)
-        existing_student = conn.execute(
-            'SELECT id FROM students WHERE email = ?',
-            (email,)
-        ).fetchone()
-
-        if existing_student:
-            conn.close()
-            flash('Email already exists. Please use another email.', 'danger')
-            return redirect(url_for('add_student'))
-
-        # 6️⃣ INSERT DATA (ONLY AFTER ALL VALIDATIONS PASS)
-        conn.execute(
-            'INSERT INTO students (name, email, course) VALUES (?, ?, ?)',
+        # 5️⃣ INSERT + DUPLICATE EMAIL CHECK IN ONE STATEMENT
+        # The UNIQUE index on email does the check; ON CONFLICT DO NOTHING skips the row
+        cursor = conn.execute(
+            'INSERT INTO students (name, email, course) VALUES (?, ?, ?) '
+            'ON CONFLICT(email) DO NOTHING',
             (name, email, course)
         )
-
         conn.commit()
-        conn.close()
 
-        # 7️⃣ SUCCESS MESSAGE + REDIRECT
+        if cursor.rowcount == 0:  # nothing inserted -> email was already taken
+            flash('Email already exists. Please use another email.', 'danger')
+            return redirect(url_for('add_student'))
+
+        # 6️⃣ SUCCESS MESSAGE + REDIRECT
         flash('Student added successfully!', 'success')
         return redirect(url_for('index'))
 
-    # 8️⃣ GET REQUEST → SHOW EMPTY FORM
+    # 7️⃣ GET REQUEST → SHOW EMPTY FORM
     return render_template('add.html')
 
 
@@ -106,12 +443,72 @@ def add_student():
 # READ - Display all students
 # =============================================================================
 
+PAGE_SIZE = 20       # Students per page (change with ?limit=N)
+MAX_PAGE_SIZE = 100  # Upper bound for ?limit so one page can never load the whole table
+
+
 @app.route('/')
 def index():
+    # Keyset pagination: ?before=<id> -> older students, ?after=<id> -> newer students.
+    # "WHERE id < ?" jumps straight to the right spot in the primary key index,
+    # so every page costs the same no matter how many students exist.
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
+    limit = min(max(request.args.get('limit', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+
     conn = get_db_connection()
-    students = conn.execute('SELECT * FROM students ORDER BY id DESC').fetchall()  # Newest first
-    conn.close()
-    return render_template('index.html', students=students)
+
+    if request.args.get('all') == '1':
+        # Streaming mode: every student, read lazily from the cursor while the HTML is sent
+        cursor = conn.execute('SELECT * FROM students ORDER BY id DESC')
+        # Read flashes now: the session cookie is sent before the template runs,
+        # so flashes read while streaming would never be cleared from it
+        messages = get_flashed_messages(with_categories=True)
+        body = stream_template('index.html', students=lazy_rows(cursor), streaming=True, messages=messages)
+        return release_after_stream(body)  # keep the connection until the last row is sent
+
+    if after is not None:  # going back towards the newest students
+        rows = conn.execute(
+            'SELECT * FROM students WHERE id > ? ORDER BY id ASC LIMIT ?',
+            (after, limit + 1)  # one extra row tells us if there is another page
+        ).fetchall()
+        has_newer = len(rows) > limit
+        students = rows[:limit][::-1]  # back to newest-first order
+        has_older = bool(students) and _has_row(conn, 'id < ?', students[-1]['id'])
+    else:
+        if before is None:  # first page
+            rows = conn.execute(
+                'SELECT * FROM students ORDER BY id DESC LIMIT ?', (limit + 1,)
+            ).fetchall()  # Newest first
+        else:
+            rows = conn.execute(
+                'SELECT * FROM students WHERE id < ? ORDER BY id DESC LIMIT ?',
+                (before, limit + 1)
+            ).fetchall()
+        has_older = len(rows) > limit
+        students = rows[:limit]
+        has_newer = bool(students) and before is not None and _has_row(conn, 'id > ?', students[0]['id'])
+
+    return render_template(
+        'index.html',
+        students=students,
+        limit=limit,
+        next_before=students[-1]['id'] if has_older else None,  # cursor for "Older"
+        prev_after=students[0]['id'] if has_newer else None,    # cursor for "Newer"
+    )
+
+
+def lazy_rows(cursor):
+    """Rows one by one from the cursor (instead of fetchall()), or [] if there are none"""
+    first = cursor.fetchone()  # peek, so {% if students %} in the template still works
+    if first is None:
+        return []
+    return itertools.chain([first], cursor)
+
+
+def _has_row(conn, where, value):
+    """Cheap indexed check: is there at least one student matching WHERE?"""
+    return conn.execute(f'SELECT 1 FROM students WHERE {where} LIMIT 1', (value,)).fetchone() is not None
 
 # @app.route('/')
 # def index():
@@ -146,19 +543,22 @@ def edit_student(id):
         email = request.form['email']
         course = request.form['course']
 
-        conn.execute(
-            'UPDATE students SET name = ?, email = ?, course = ? WHERE id = ?',
-            (name, email, course, id)  # Update WHERE id matches
-        )
-        conn.commit()
-        conn.close()
+        try:
+            conn.execute(
+                'UPDATE students SET name = ?, email = ?, course = ? WHERE id = ?',
+                (name, email, course, id)  # Update WHERE id matches
+            )
+            conn.commit()
+        except sqlite3.IntegrityError:  # UNIQUE index on email rejected the change
+            conn.rollback()
+            flash('Email already exists. Please use another email.', 'danger')
+            return redirect(url_for('edit_student', id=id))
 
         flash('Student updated successfully!', 'success')
         return redirect(url_for('index'))
 
     # GET request: fetch current data and show in form
     student = conn.execute('SELECT * FROM students WHERE id = ?', (id,)).fetchone()
-    conn.close()
     return render_template('edit.html', student=student)
 
 
@@ -171,7 +571,6 @@ def delete_student(id):
     conn = get_db_connection()
     conn.execute('DELETE FROM students WHERE id = ?', (id,))  # Remove row
     conn.commit()
-    conn.close()
 
     flash('Student deleted!', 'danger')  # Show delete message
     return redirect(url_for('index'))
@@ -179,20 +578,129 @@ def delete_student(id):
     
 @app.route('/search', methods=['GET'])
 def search():
-    name = request.args.get('name')  # get search text from URL
+    name = request.args.get('name', '').strip()  # get search text from URL
     students = []
 
     if name:
         conn = get_db_connection()
+        # MATCH uses the FTS5 index (no full table scan), bm25() ranks best matches first
         students = conn.execute(
-            "SELECT * FROM students WHERE name LIKE ?",
-            (f"%{name}%",)
+            '''
+            SELECT students.* FROM students_fts
+            JOIN students ON students.id = students_fts.rowid
+            WHERE students_fts MATCH ?
+            ORDER BY bm25(students_fts)
+            LIMIT ?
+            ''',
+            (fts_query(name), SEARCH_LIMIT)
         ).fetchall()
-        conn.close()
-        
+
     return render_template("search.html", students=students)
 
-    
+
+# =============================================================================
+# BULK IMPORT / EXPORT - CSV files streamed in and out
+# =============================================================================
+
+IMPORT_CHUNK_SIZE = 5000  # Rows per executemany() + commit (one transaction per chunk)
+EXPORT_BATCH_SIZE = 1000  # Rows read from the cursor per fetchmany()
+
+
+@app.route('/students/import', methods=['GET', 'POST'])
+def import_students():
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Please choose a CSV file', 'danger')
+            return redirect(url_for('import_students'))
+
+        # Read the upload line by line (never the whole file in memory)
+        reader = csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+        try:
+            header = reader.fieldnames
+        except (UnicodeDecodeError, csv.Error):
+            flash('Could not read the file - please upload a UTF-8 encoded CSV', 'danger')
+            return redirect(url_for('import_students'))
+        if not header or not {'name', 'email', 'course'} <= set(header):
+            flash('CSV header must contain: name, email, course', 'danger')
+            return redirect(url_for('import_students'))
+
+        invalid = 0
+        valid = 0
+        read_error = None
+
+        def valid_rows():
+            nonlocal invalid, valid, read_error
+            try:
+                for row in reader:
+                    name, email, course = ((row.get(column) or '').strip() for column in ('name', 'email', 'course'))
+                    # same rules as the Add Student form
+                    if name and email and course and len(name) >= 2 and '@' in email and '.' in email:
+                        valid += 1
+                        yield name, email, course
+                    else:
+                        invalid += 1  # missing or invalid field -> skip the row
+            except (UnicodeDecodeError, csv.Error) as error:  # stop, but keep the rows read so far
+                reason = 'not UTF-8 text' if isinstance(error, UnicodeDecodeError) else f'malformed CSV: {error}'
+                read_error = f'line {reader.line_num + 1} ({reason})'
+
+        conn = get_db_connection()
+        rows = valid_rows()
+        imported = 0
+        started = time.perf_counter()
+
+        while True:
+            chunk = list(itertools.islice(rows, IMPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            cursor = conn.executemany(
+                'INSERT INTO students (name, email, course) VALUES (?, ?, ?) '
+                'ON CONFLICT(email) DO NOTHING',  # existing email -> skip (see idx_students_email)
+                chunk
+            )
+            conn.commit()
+            imported += cursor.rowcount
+
+        seconds = time.perf_counter() - started
+        rate = imported / seconds if seconds else 0
+        app.logger.info('CSV import: %d rows in %.2fs (%.0f rows/sec)', imported, seconds, rate)
+        summary = (f'Imported {imported} students in {seconds:.1f}s ({rate:,.0f} rows/sec). '
+                   f'Skipped {invalid} invalid row(s) and {valid - imported} existing email(s).')
+        if read_error:
+            flash(f'Import stopped near {read_error} - the rest of the file was not read. {summary}', 'danger')
+            return redirect(url_for('import_students'))
+        flash(summary, 'success')
+        return redirect(url_for('index'))
+
+    return render_template('import.html')
+
+
+@app.route('/students/export')
+def export_students():
+    def generate():
+        conn = get_db_connection()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['id', 'name', 'email', 'course'])
+
+        cursor = conn.execute('SELECT id, name, email, course FROM students ORDER BY id')
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            yield buffer.getvalue()  # send this batch, then reuse the buffer
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    # stream_with_context keeps the request (and its DB connection) alive while streaming
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=students.csv'}
+    )
+
+
 
 if __name__ == '__main__':
     init_db()
@@ -228,6 +736,10 @@ if __name__ == '__main__':
 #    - Shows one-time message to user
 #    - Categories: 'success', 'danger', 'warning', 'info'
 #
+# 5. Connection pool + @app.teardown_appcontext
+#    - get_db_connection() borrows one warm connection per request
+#    - teardown_appcontext gives it back to the pool (no conn.close() in routes)
+#
 # =============================================================================
 
 
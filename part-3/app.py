@@ -16,6 +16,12 @@ Install: pip install flask-sqlalchemy
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy  # Import SQLAlchemy
 from sqlalchemy.exc import IntegrityError # for validations and error check
+from sqlalchemy.orm import joinedload, selectinload, lazyload
+from contextlib import contextmanager
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+import os
+import sqlite3
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key'
@@ -25,9 +31,51 @@ app.secret_key = 'your-secret-key'
 # =============================================================================
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///school.db'  # Database file
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable warning
+app.config['SQLITE_PRAGMA_PROFILE'] = os.getenv('SQLITE_PRAGMA_PROFILE', 'fast')  # 'fast' or 'default'
+app.config['RELATIONSHIP_LOADING'] = os.getenv('RELATIONSHIP_LOADING', 'joined')  # 'joined', 'selectin' or 'lazy'
 
 db = SQLAlchemy(app)  # Initialize SQLAlchemy with app
 
+# =============================================================================
+# SQLITE PRAGMA PROFILES - applied to every new engine connection
+# =============================================================================
+
+SQLITE_PRAGMA_PROFILES = {
+    'default': {},  # SQLite's own settings (rollback journal, fsync on every commit)
+    'fast': {
+        'journal_mode': 'WAL',    # readers no longer wait behind writers
+        'synchronous': 'NORMAL',  # fsync at checkpoints instead of every commit (safe with WAL)
+        'mmap_size': 268435456,   # read the file through 256 MB of memory-mapped I/O
+        'cache_size': -64000,     # ~64 MB page cache (negative value = size in KiB)
+        'temp_store': 'MEMORY',   # temp tables and sorts stay in RAM
+        'busy_timeout': 5000,     # wait up to 5 s for a lock instead of failing at once
+    },
+}
+
+if app.config['SQLITE_PRAGMA_PROFILE'] not in SQLITE_PRAGMA_PROFILES:  # fail at startup, not on the first connection
+    raise RuntimeError(f"SQLITE_PRAGMA_PROFILE={app.config['SQLITE_PRAGMA_PROFILE']!r} is unknown "
+                       f"(use {' or '.join(SQLITE_PRAGMA_PROFILES)})")
+
+
+@event.listens_for(Engine, 'connect')
+def apply_pragmas(dbapi_connection, connection_record):
+    """Engine 'connect' event: run the selected profile on each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return  # PostgreSQL / MySQL -> nothing to do
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMA_PROFILES[app.config['SQLITE_PRAGMA_PROFILE']].items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def effective_pragmas():
+    """Read back what SQLite is actually using (printed at startup)"""
+    with db.engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in SQLITE_PRAGMA_PROFILES['fast']
+        }
+
 
 # =============================================================================
 # MODELS (Python Classes = Database Tables)
@@ -51,12 +99,49 @@ class Student(db.Model):  # Student table
     email = db.Column(db.String(120), unique=True, nullable=False)  # unique=True means no duplicates
 
     # Foreign Key: Links student to a course
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)  #<column_name> = db.Column(db.<Type>, db.ForeignKey('<parent_table>.<parent_pk>'), nullable=<True/False>)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)  # index=True -> course.students is a fast lookup  #<column_name> = db.Column(db.<Type>, db.ForeignKey('<parent_table>.<parent_pk>'), nullable=<True/False>)
 
     def __repr__(self):
         return f'<Student {self.name}>'
 
 
+# =============================================================================
+# RELATIONSHIP LOADING - load student.course up front (no N+1)
+# =============================================================================
+
+LOADER_STRATEGIES = {
+    'joined': joinedload,      # one query: LEFT OUTER JOIN course
+    'selectin': selectinload,  # two queries: rows, then course WHERE id IN (...)
+    'lazy': lazyload,          # old behaviour: one extra SELECT per row
+}
+
+
+def with_course(model):
+    """model.query with .course loaded using app.config['RELATIONSHIP_LOADING']"""
+    loader = LOADER_STRATEGIES[app.config['RELATIONSHIP_LOADING']]
+    return model.query.options(loader(model.course))
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement run inside the block (handy for N+1 checks):
+
+        with count_queries() as queries:
+            app.test_client().get('/')
+        assert len(queries) == 2   # same number with 10 or 10,000 students
+    """
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+
+
 # =============================================================================
 # ROUTES - Using ORM instead of raw SQL
 # =============================================================================
@@ -65,13 +150,28 @@ class Student(db.Model):  # Student table
 def index():
     # OLD WAY (raw SQL): conn.execute('SELECT * FROM students').fetchall()
     # NEW WAY (ORM):
-    students = Student.query.all()  # Get all students
+    students = with_course(Student).all()  # Get all students (+ their course, no extra queries)
     return render_template('index.html', students=students)
 
 
 @app.route('/courses')
 def courses():
-    all_courses = Course.query.all()  # Get all courses
+    # Count students per course in SQL (GROUP BY) instead of loading every
+    # Student object just to call |length on course.students
+    student_counts = (
+        db.session.query(Student.course_id, func.count(Student.id).label('total'))
+        .group_by(Student.course_id)
+        .subquery()
+    )
+    all_courses = (
+        db.session.query(
+            Course,
+            func.coalesce(student_counts.c.total, 0).label('student_count'),
+        )
+        .outerjoin(student_counts, student_counts.c.course_id == Course.id)
+        .order_by(Course.id)
+        .all()
+    )  # One query -> rows of (Course, student_count)
     return render_template('courses.html', courses=all_courses)
 
 
@@ -141,6 +241,42 @@ def add_course():
     return render_template('add_course.html')
 
 
+# =============================================================================
+# INDEXES - add missing ones to old databases + EXPLAIN QUERY PLAN check
+# =============================================================================
+
+def migrate_indexes():
+    """Create every index declared on the models that an older school.db is missing"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)  # checkfirst -> skip if it already exists
+
+
+def index_checks():
+    """The lookups our routes run, as (description, query) pairs"""
+    return [
+        ('add/edit student: email lookup', Student.query.filter_by(email='x@example.com')),
+        ('course.students (relationship load)', Student.query.filter_by(course_id=1)),
+    ]
+
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """Fail if any route lookup does a full table scan (run: flask --app <file> check-indexes)"""
+    init_db()
+    with app.app_context():
+        scans = 0
+        for description, query in index_checks():
+            sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+            plan = [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+            # "SEARCH student USING INDEX ..." is good, a plain "SCAN student" reads every row
+            scanned = [step for step in plan if step.startswith('SCAN') and 'INDEX' not in step]
+            scans += bool(scanned)
+            print(f"{'SCAN' if scanned else 'OK  '}  {description}: {'; '.join(plan)}")
+    if scans:
+        raise SystemExit(f'{scans} lookup(s) scan a whole table - add an index!')
+
+
 # =============================================================================
 # CREATE TABLES AND ADD SAMPLE DATA
 # =============================================================================
@@ -149,6 +285,8 @@ def init_db():
     """Create tables and add sample courses if empty"""
     with app.app_context():
         db.create_all()  # Create all tables based on models
+        migrate_indexes()  # create_all() never touches existing tables, so add new indexes here
+        print(f"SQLite pragmas ({app.config['SQLITE_PRAGMA_PROFILE']}):", effective_pragmas())
 
         # Add sample courses if none exist
         if Course.query.count() == 0:
@@ -16,9 +16,24 @@ Prerequisites: Complete part-1 and part-2
 Install: pip install flask-sqlalchemy
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort
 from flask_sqlalchemy import SQLAlchemy  # Import SQLAlchemy
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, lazyload, Session
+from collections import namedtuple
+from contextlib import contextmanager
+import csv
+import io
+import itertools
+import hashlib
+import math
+import threading
+import time
+from sqlalchemy import create_engine, event, func, inspect
+from sqlalchemy.engine import Engine
+import os
+import sqlite3
+import tempfile
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key'
@@ -28,9 +43,52 @@ app.secret_key = 'your-secret-key'
 # =============================================================================
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///school.db'  # Database file
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable warning
+app.config['SQLITE_PRAGMA_PROFILE'] = os.getenv('SQLITE_PRAGMA_PROFILE', 'fast')  # 'fast' or 'default'
+app.config['RELATIONSHIP_LOADING'] = os.getenv('RELATIONSHIP_LOADING', 'joined')  # 'joined', 'selectin' or 'lazy'
+app.config['COURSE_CACHE_TTL'] = int(os.getenv('COURSE_CACHE_TTL', 300))  # seconds; safety net when running several processes
 
 db = SQLAlchemy(app)  # Initialize SQLAlchemy with app
 
+# =============================================================================
+# SQLITE PRAGMA PROFILES - applied to every new engine connection
+# =============================================================================
+
+SQLITE_PRAGMA_PROFILES = {
+    'default': {},  # SQLite's own settings (rollback journal, fsync on every commit)
+    'fast': {
+        'journal_mode': 'WAL',    # readers no longer wait behind writers
+        'synchronous': 'NORMAL',  # fsync at checkpoints instead of every commit (safe with WAL)
+        'mmap_size': 268435456,   # read the file through 256 MB of memory-mapped I/O
+        'cache_size': -64000,     # ~64 MB page cache (negative value = size in KiB)
+        'temp_store': 'MEMORY',   # temp tables and sorts stay in RAM
+        'busy_timeout': 5000,     # wait up to 5 s for a lock instead of failing at once
+    },
+}
+
+if app.config['SQLITE_PRAGMA_PROFILE'] not in SQLITE_PRAGMA_PROFILES:  # fail at startup, not on the first connection
+    raise RuntimeError(f"SQLITE_PRAGMA_PROFILE={app.config['SQLITE_PRAGMA_PROFILE']!r} is unknown "
+                       f"(use {' or '.join(SQLITE_PRAGMA_PROFILES)})")
+
+
+@event.listens_for(Engine, 'connect')
+def apply_pragmas(dbapi_connection, connection_record):
+    """Engine 'connect' event: run the selected profile on each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return  # PostgreSQL / MySQL -> nothing to do
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMA_PROFILES[app.config['SQLITE_PRAGMA_PROFILE']].items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def effective_pragmas():
+    """Read back what SQLite is actually using (printed at startup)"""
+    with db.engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in SQLITE_PRAGMA_PROFILES['fast']
+        }
+
 
 # =============================================================================
 # MODELS (Python Classes = Database Tables)
@@ -53,10 +111,10 @@ class Course(db.Model):  # Course table
 class Student(db.Model):  # Student table
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)  # unique=True means no duplicates
-    email = db.Column(db.String(100),  nullable=False)
+    email = db.Column(db.String(100),  nullable=False, index=True, unique=True)  # UNIQUE index -> fast lookups, no duplicates
     
     # Foreign Key: Links student to a course
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)  #<column_name> = db.Column(db.<Type>, db.ForeignKey('<parent_table>.<parent_pk>'), nullable=<True/False>)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)  #<column_name> = db.Column(db.<Type>, db.ForeignKey('<parent_table>.<parent_pk>'), nullable=<True/False>)
 
     def __repr__(self):
         return f'<Student {self.name}>'
@@ -64,10 +122,10 @@ class Student(db.Model):  # Student table
 class Teacher(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), nullable = False)
+    email = db.Column(db.String(100), nullable = False, index=True, unique=True)  # UNIQUE index -> fast lookups, no duplicates
 
     # Foreign key → one Teacher belongs to one Course
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)  # course.teachers filters on this
 
     def __repr__(self):
         return f'<Teacher {self.name}>'
@@ -79,22 +137,307 @@ class Teacher(db.Model):
 # course.students      # list of students
 # student.course       # course of this student
 
+# =============================================================================
+# RELATIONSHIP LOADING - load student.course / teacher.course up front (no N+1)
+# =============================================================================
+
+LOADER_STRATEGIES = {
+    'joined': joinedload,      # one query: LEFT OUTER JOIN course
+    'selectin': selectinload,  # two queries: rows, then course WHERE id IN (...)
+    'lazy': lazyload,          # old behaviour: one extra SELECT per row
+}
+
+
+def with_course(model):
+    """model.query with .course loaded using app.config['RELATIONSHIP_LOADING']"""
+    loader = LOADER_STRATEGIES[app.config['RELATIONSHIP_LOADING']]
+    return model.query.options(loader(model.course))
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement run inside the block (handy for N+1 checks):
+
+        with count_queries() as queries:
+            app.test_client().get('/')
+        assert len(queries) == 2   # same number with 10 or 10,000 students
+    """
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+
+
+# =============================================================================
+# COURSE CACHE - dropdown data kept in memory, reloaded only when courses change
+# =============================================================================
+
+CourseOption = namedtuple('CourseOption', ['id', 'name'])  # what the <select> needs
+
+_course_version = 0  # bumped after every commit that adds / edits / deletes a Course
+_course_cache = {'version': None, 'loaded_at': 0.0, 'options': [], 'ids': set()}
+_course_cache_lock = threading.Lock()
+
+
+@event.listens_for(Session, 'before_flush')
+def _note_course_changes(session, flush_context, instances):
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, Course) for obj in changed):
+        session.info['courses_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_course_version(session):
+    global _course_version
+    if session.info.pop('courses_changed', False):
+        _course_version += 1  # next cached_courses() call reloads from the database
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_course_changes(session):
+    session.info.pop('courses_changed', None)  # rolled back -> nothing really changed
+
+
+def cached_courses():
+    """All courses as (id, name) - only queries the database after a course change"""
+    with _course_cache_lock:
+        expired = time.monotonic() - _course_cache['loaded_at'] > app.config['COURSE_CACHE_TTL']
+        if _course_cache['version'] != _course_version or expired:
+            version = _course_version  # read first, so a commit during the query forces another reload
+            rows = db.session.query(Course.id, Course.name).order_by(Course.id).all()
+            _course_cache['options'] = [CourseOption(*row) for row in rows]
+            _course_cache['ids'] = {row.id for row in rows}
+            _course_cache['version'] = version
+            _course_cache['loaded_at'] = time.monotonic()
+        return _course_cache['options']
+
+
+def course_exists(course_id):
+    """Validate a course_id from a form without querying the database"""
+    try:
+        course_id = int(course_id)
+    except (TypeError, ValueError):
+        return False
+    cached_courses()  # make sure the cache is fresh
+    return course_id in _course_cache['ids']
+
+
+# =============================================================================
+# EMAIL REGISTRY - Bloom filter that answers "is this email new?" without a query
+# =============================================================================
+
+class EmailRegistry:
+    """Counting Bloom filter of 'student:<email>' and 'teacher:<email>' keys.
+
+    might_contain() False -> the email is definitely new (no query needed)
+    might_contain() True  -> maybe taken, confirm with an indexed lookup
+    Counters instead of single bits let us remove emails on update / delete.
+    """
+
+    def __init__(self, capacity, fp_rate=0.01):
+        self.capacity = max(capacity, 1000)
+        self.size = math.ceil(-self.capacity * math.log(fp_rate) / math.log(2) ** 2)  # number of counters
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.counters = bytearray(self.size)  # 1 byte per counter
+        self.items = 0
+        self.lookups = 0
+        self.definitely_new = 0   # answered without touching the database
+        self.false_positives = 0  # "maybe" answers the database said were new
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]  # double hashing
+
+    def add(self, key):
+        for position in self._positions(key):
+            if self.counters[position] < 255:
+                self.counters[position] += 1
+        self.items += 1
+
+    def remove(self, key):
+        positions = self._positions(key)
+        if not all(self.counters[position] for position in positions):
+            return  # never added -> nothing to remove
+        for position in positions:
+            if self.counters[position] < 255:  # 255 = saturated, must stay set
+                self.counters[position] -= 1
+        self.items -= 1
+
+    def might_contain(self, key):
+        self.lookups += 1
+        found = all(self.counters[position] for position in self._positions(key))
+        if not found:
+            self.definitely_new += 1
+        return found
+
+    def stats(self):
+        estimated = (1 - math.exp(-self.hashes * self.items / self.size)) ** self.hashes
+        return {
+            'items': self.items,
+            'capacity': self.capacity,
+            'hashes': self.hashes,
+            'memory_bytes': len(self.counters),
+            'estimated_false_positive_rate': round(estimated, 6),
+            'lookups': self.lookups,
+            'answered_without_query': self.definitely_new,
+            'false_positives': self.false_positives,
+        }
+
+
+EMAIL_MODELS = {'student': Student, 'teacher': Teacher}
+
+_email_registry = None
+_email_registry_lock = threading.Lock()
+
+
+def _build_email_registry():
+    """Streamed scan of every student and teacher email (yield_per -> never all in memory)"""
+    total = Student.query.count() + Teacher.query.count()
+    registry = EmailRegistry(capacity=total * 2)  # room to grow before the false positive rate rises
+    for kind, model in EMAIL_MODELS.items():
+        for (email,) in db.session.query(model.email).yield_per(10000):
+            registry.add(f'{kind}:{email}')
+    return registry
+
+
+def get_email_registry():
+    """The registry, built on first use and rebuilt bigger once it outgrows its capacity.
+
+    Our own commits update it right away (see the Session events below). An
+    email added by another worker process may be answered "definitely new";
+    the UNIQUE email index then rejects the insert with an IntegrityError.
+    """
+    global _email_registry
+    with _email_registry_lock:
+        if _email_registry is None or _email_registry.items > _email_registry.capacity:
+            _email_registry = _build_email_registry()
+        return _email_registry
+
+
+def remember_emails(kind, added=(), removed=()):
+    """Apply committed email changes to the registry (if it has been built yet)"""
+    with _email_registry_lock:
+        if _email_registry is None:
+            return  # will be built from the database, which already has these changes
+        for email in removed:
+            _email_registry.remove(f'{kind}:{email}')
+        for email in added:
+            _email_registry.add(f'{kind}:{email}')
+
+
+def email_taken(kind, email, exclude_id=None):
+    """Is this student / teacher email used? Only 'maybe' answers run a query"""
+    registry = get_email_registry()
+    if not registry.might_contain(f'{kind}:{email}'):
+        return False  # the common case: brand-new email, zero queries
+
+    model = EMAIL_MODELS[kind]
+    query = model.query.filter(model.email == email)  # indexed lookup (ix_<table>_email)
+    if exclude_id is not None:
+        query = query.filter(model.id != exclude_id)
+    taken = query.first() is not None
+    if not taken and exclude_id is None:
+        registry.false_positives += 1
+    return taken
+
+
+@event.listens_for(Session, 'before_flush')
+def _note_email_changes(session, flush_context, instances):
+    changes = session.info.setdefault('email_changes', [])
+    for obj in session.new:
+        if isinstance(obj, (Student, Teacher)):
+            changes.append((obj.__tablename__, [obj.email], []))
+    for obj in session.dirty:
+        if isinstance(obj, (Student, Teacher)):
+            history = inspect(obj).attrs.email.history
+            if history.has_changes():
+                changes.append((obj.__tablename__, list(history.added), list(history.deleted)))
+    for obj in session.deleted:
+        if isinstance(obj, (Student, Teacher)):
+            changes.append((obj.__tablename__, [], [obj.email]))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_email_changes(session):
+    for kind, added, removed in session.info.pop('email_changes', []):
+        remember_emails(kind, added, removed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_email_changes(session):
+    session.info.pop('email_changes', None)
+
+
 # =============================================================================
 # ROUTES - Using ORM instead of raw SQL
 # =============================================================================
 
+DASHBOARD_PAGE_SIZE = 10  # Rows per section on the home page
+
+
 @app.route('/')
 def index():
     # OLD WAY (raw SQL): conn.execute('SELECT * FROM students').fetchall()
     # NEW WAY (ORM):
-    students = Student.query.all()  # Get all students
-    teachers = Teacher.query.all()  # Get all students
-    return render_template('index.html', students=students , teachers = teachers) 
+    # 1 query for both totals: SELECT (SELECT count(*) FROM student), (SELECT count(*) FROM teacher)
+    student_total, teacher_total = db.session.query(
+        db.session.query(func.count(Student.id)).scalar_subquery(),
+        db.session.query(func.count(Teacher.id)).scalar_subquery(),
+    ).one()
+    student_pages = max(math.ceil(student_total / DASHBOARD_PAGE_SIZE), 1)
+    teacher_pages = max(math.ceil(teacher_total / DASHBOARD_PAGE_SIZE), 1)
+
+    # ?student_page=N / ?teacher_page=N, kept inside 1..last page
+    student_page = min(max(request.args.get('student_page', 1, type=int), 1), student_pages)
+    teacher_page = min(max(request.args.get('teacher_page', 1, type=int), 1), teacher_pages)
+
+    # 1 bounded query per section (LIMIT one page), courses joined in -> no N+1
+    students = (with_course(Student).order_by(Student.id)
+                .limit(DASHBOARD_PAGE_SIZE).offset((student_page - 1) * DASHBOARD_PAGE_SIZE).all())
+    teachers = (with_course(Teacher).order_by(Teacher.id)
+                .limit(DASHBOARD_PAGE_SIZE).offset((teacher_page - 1) * DASHBOARD_PAGE_SIZE).all())
+
+    return render_template(
+        'index.html',
+        students=students, teachers=teachers,
+        student_page=student_page, student_pages=student_pages, student_total=student_total,
+        teacher_page=teacher_page, teacher_pages=teacher_pages, teacher_total=teacher_total,
+    )
 
 
 @app.route('/courses')
 def courses():
-    all_courses = Course.query.all()  # Get all courses
+    # Count students / teachers per course in SQL (GROUP BY) instead of loading
+    # every Student object just to call |length on course.students
+    student_counts = (
+        db.session.query(Student.course_id, func.count(Student.id).label('total'))
+        .group_by(Student.course_id)
+        .subquery()
+    )
+    teacher_counts = (
+        db.session.query(Teacher.course_id, func.count(Teacher.id).label('total'))
+        .group_by(Teacher.course_id)
+        .subquery()
+    )
+    all_courses = (
+        db.session.query(
+            Course,
+            func.coalesce(student_counts.c.total, 0).label('student_count'),
+            func.coalesce(teacher_counts.c.total, 0).label('teacher_count'),
+        )
+        .outerjoin(student_counts, student_counts.c.course_id == Course.id)
+        .outerjoin(teacher_counts, teacher_counts.c.course_id == Course.id)
+        .order_by(Course.id)
+        .all()
+    )  # One query -> rows of (Course, student_count, teacher_count)
     return render_template('courses.html', courses=all_courses)
 
 
@@ -131,14 +474,13 @@ def add_student():
             flash('All fields are required', 'danger')
             return redirect(url_for('add_student'))
 
-        # 3️⃣ Check duplicate email (business validation)
-        if Student.query.filter_by(email=email).first():
+        # 3️⃣ Check duplicate email (business validation) - Bloom filter first, query only if needed
+        if email_taken('student', email):
             flash('Email already exists', 'danger')
             return redirect(url_for('add_student'))
 
         # 4️⃣ Validate course exists
-        course = Course.query.get(course_id)
-        if not course:
+        if not course_exists(course_id):  # checked against the in-memory course cache
             flash('Invalid course selected', 'danger')
             return redirect(url_for('add_student'))
 
@@ -161,7 +503,7 @@ def add_student():
             return redirect(url_for('add_student'))
 
     # GET request
-    courses = Course.query.all()
+    courses = cached_courses()  # Dropdown options from the course cache (no query)
     return render_template('add.html', courses=courses)
 
 
@@ -202,17 +544,11 @@ def edit_student(id):
             flash('ALL Filelds are required' , 'danger')
             return redirect(url_for('edit_student' , id = id))
         
-        course = Course.query.get(course_id)
-        if not course:
+        if not course_exists(course_id):  # checked against the in-memory course cache
             flash('Invalid course selected' , 'danger')
             return redirect(url_for('edit_student' , id = id))
         
-        existing_student = Student.query.filter( 
-            Student.email == email ,
-            Student.id != id   
-        ).first()
-
-        if existing_student:
+        if email_taken('student', email, exclude_id=id):  # used by another student?
             flash('Email already exist' , 'danger')
             return redirect(url_for('edit_student' , id=id))
 
@@ -232,7 +568,7 @@ def edit_student(id):
 
       
 
-    courses = Course.query.all()
+    courses = cached_courses()  # Dropdown options from the course cache (no query)
     return render_template('edit.html', student=student, courses=courses)
 
 
@@ -261,9 +597,15 @@ def add_course():
 
     return render_template('add_course.html')
 
+@app.route('/stats/email-registry')
+def email_registry_stats():
+    """Size, memory and false positive rate of the email Bloom filter"""
+    return jsonify(get_email_registry().stats())
+
+
 @app.route('/teachers')
 def teachers():
-    teacher_list = Teacher.query.all()
+    teacher_list = with_course(Teacher).all()
     
     return render_template('teacher.html' , teachers = teacher_list)
 
@@ -298,14 +640,13 @@ def add_teacher():
             flash('All fields are required', 'danger')
             return redirect(url_for('add_teacher'))
 
-        # 3️⃣ Check duplicate email (business validation)
-        if Student.query.filter_by(email=email).first():
+        # 3️⃣ Check duplicate email (business validation) - Bloom filter first, query only if needed
+        if email_taken('teacher', email):
             flash('Email already exists', 'danger')
             return redirect(url_for('add_teacher'))
 
         # 4️⃣ Validate course exists
-        course = Course.query.get(course_id)
-        if not course:
+        if not course_exists(course_id):  # checked against the in-memory course cache
             flash('Invalid course selected', 'danger')
             return redirect(url_for('add_teacher'))
 
@@ -328,7 +669,7 @@ def add_teacher():
             return redirect(url_for('add_teacher'))
 
     # GET request
-    courses = Course.query.all()
+    courses = cached_courses()  # Dropdown options from the course cache (no query)
     return render_template('add_teacher.html', courses=courses)
 
 
@@ -368,18 +709,12 @@ def edit_teacher(id):
             return redirect(url_for('edit_teacher', id=id))
 
         # 2️⃣ Validate course
-        course = Course.query.get(course_id)
-        if not course:
+        if not course_exists(course_id):  # checked against the in-memory course cache
             flash('Invalid course selected', 'danger')
             return redirect(url_for('edit_teacher', id=id))
 
         # 3️⃣ Email uniqueness check (exclude current teacher)
-        existing_teacher = Teacher.query.filter(
-            Teacher.email == email,
-            Teacher.id != id
-        ).first()
-
-        if existing_teacher:
+        if email_taken('teacher', email, exclude_id=id):
             flash('Email already exists', 'danger')
             return redirect(url_for('edit_teacher', id=id))
 
@@ -399,7 +734,7 @@ def edit_teacher(id):
             return redirect(url_for('edit_teacher', id=id))
 
     # GET request
-    courses = Course.query.all()
+    courses = cached_courses()  # Dropdown options from the course cache (no query)
     return render_template(
         'edit_teacher.html',
         teacher=teacher,
@@ -417,6 +752,293 @@ def delete_teacher(id):
     flash('Student deleted!', 'danger')
     return redirect(url_for('teachers'))
 
+
+# =============================================================================
+# BULK ENROLLMENT - thousands of students / teachers in one request
+# =============================================================================
+
+BULK_MODELS = {'students': Student, 'teachers': Teacher}
+BULK_CHUNK_SIZE = 5000  # Rows validated + inserted + committed together
+SQL_IN_LIMIT = 900      # Max values per IN (...) so we stay under SQLite's variable limit
+
+
+def _read_bulk_rows():
+    """Rows from a JSON list body, or from a CSV upload / text/csv body (read as a stream)"""
+    if request.is_json:
+        rows = request.get_json(silent=True)
+        return rows if isinstance(rows, list) else None
+
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+    elif request.mimetype == 'text/csv':
+        stream = request.stream
+    else:
+        return None
+    return csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+
+
+def _course_id(value):
+    """3 (JSON) or '3' (CSV cell) -> 3; anything else (1.9, true, 'abc', '') -> None"""
+    if isinstance(value, bool):
+        return None  # JSON true is an int to Python, not a course id
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdecimal():
+        return int(value.strip())
+    return None
+
+
+def _existing_emails(model, emails):
+    """Which of these emails are already in the table (one indexed IN query per 900 emails)"""
+    registry = get_email_registry()
+    emails = [email for email in emails if registry.might_contain(f'{model.__tablename__}:{email}')]  # skip definitely-new ones
+    taken = set()
+    for start in range(0, len(emails), SQL_IN_LIMIT):
+        batch = emails[start:start + SQL_IN_LIMIT]
+        taken.update(email for (email,) in db.session.query(model.email).filter(model.email.in_(batch)))
+    return taken
+
+
+@app.route('/bulk/<kind>', methods=['POST'])
+def bulk_enroll(kind):
+    """POST /bulk/students or /bulk/teachers with a JSON list or CSV of name, email, course_id"""
+    model = BULK_MODELS.get(kind)
+    if model is None:
+        abort(404)
+
+    rows = _read_bulk_rows()
+    if rows is None:
+        return jsonify({'success': False, 'error': 'Send a JSON list or a CSV file with name,email,course_id'}), 400
+
+    started = time.perf_counter()
+    course_ids = {course.id for course in cached_courses()}  # valid ids, straight from the course cache
+    seen_emails = set()  # catches the same email twice inside this batch
+    errors = []
+    inserted = 0
+    read_error = None
+
+    def readable(rows):
+        """The rows until the CSV turns out to be unreadable (not UTF-8 / malformed)"""
+        nonlocal read_error
+        count = 0
+        try:
+            for row in rows:
+                count += 1
+                yield row
+        except (UnicodeDecodeError, csv.Error) as error:
+            read_error = f'Could not read the CSV after row {count}: {error}'
+
+    numbered = enumerate(readable(rows), start=1)  # row numbers for the error report
+    while True:
+        chunk = list(itertools.islice(numbered, BULK_CHUNK_SIZE))
+        if not chunk:
+            break
+
+        # 1️⃣ Per-row checks (no database needed)
+        candidates = []
+        for number, row in chunk:
+            if not isinstance(row, dict):
+                errors.append({'row': number, 'error': 'Row must be an object'})
+                continue
+            name = str(row.get('name') or '').strip()
+            email = str(row.get('email') or '').strip()
+            course_id = _course_id(row.get('course_id'))
+
+            if not name or not email or row.get('course_id') in (None, ''):
+                errors.append({'row': number, 'error': 'name, email and course_id are required'})
+            elif course_id is None:
+                errors.append({'row': number, 'error': 'course_id must be a whole number'})
+            elif course_id not in course_ids:
+                errors.append({'row': number, 'error': f'Invalid course_id {course_id}'})
+            elif email in seen_emails:
+                errors.append({'row': number, 'error': 'Email repeated in this batch'})
+            else:
+                seen_emails.add(email)
+                candidates.append((number, {'name': name, 'email': email, 'course_id': course_id}))
+
+        # 2️⃣ One set-based query for the whole chunk instead of one per row
+        taken = _existing_emails(model, (mapping['email'] for _, mapping in candidates))
+        mappings = []
+        sent = []  # row numbers of the mappings
+        for number, mapping in candidates:
+            if mapping['email'] in taken:
+                errors.append({'row': number, 'error': 'Email already exists'})
+            else:
+                mappings.append(mapping)
+                sent.append(number)
+
+        # 3️⃣ Insert the chunk in one transaction
+        try:
+            db.session.bulk_insert_mappings(model, mappings)
+            db.session.commit()
+            inserted += len(mappings)
+            remember_emails(model.__tablename__, added=[mapping['email'] for mapping in mappings])  # bulk inserts skip flush events
+        except IntegrityError:
+            db.session.rollback()
+            # only the rows that went into the INSERT - the others already have an error
+            errors.extend({'row': number, 'error': 'Database error, chunk not saved'} for number in sent)
+
+    seconds = time.perf_counter() - started
+    errors.sort(key=lambda error: error['row'])
+    result = {
+        'success': read_error is None,
+        'inserted': inserted,  # chunks before a read error are already committed
+        'failed': len(errors),
+        'errors': errors,
+        'rows_per_sec': round(inserted / seconds) if seconds else inserted,
+    }
+    if read_error:
+        return jsonify({**result, 'error': read_error}), 400
+    return jsonify(result)
+
+# =============================================================================
+# INDEXES - add missing ones to old databases + EXPLAIN QUERY PLAN check
+# =============================================================================
+
+def remove_duplicates(conn, table, columns):
+    """Migration: keep the oldest row for each value so a UNIQUE index can be created"""
+    names = ', '.join(column.name for column in columns)
+    duplicates = conn.execute(db.text(
+        f'SELECT {names}, COUNT(*) FROM {table.name} GROUP BY {names} HAVING COUNT(*) > 1'
+    )).fetchall()
+    if duplicates:
+        print(f'Found {len(duplicates)} duplicate {table.name} {names}(s), keeping the oldest row for each:')
+        for *values, copies in duplicates:
+            print(f"  {', '.join(map(str, values))} ({copies} rows)")
+        conn.execute(db.text(f'DELETE FROM {table.name} WHERE id NOT IN (SELECT MIN(id) FROM {table.name} GROUP BY {names})'))
+
+
+def migrate_indexes():
+    """Create every index declared on the models that an older school.db is missing"""
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {index['name']: index for index in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                old = existing.get(index.name)
+                if index.unique and not (old and old['unique']):
+                    if old:
+                        index.drop(bind=conn)  # older non-unique version of this index
+                    remove_duplicates(conn, table, index.columns)
+                index.create(bind=conn, checkfirst=True)  # checkfirst -> skip if it already exists
+
+
+def index_checks():
+    """The lookups our routes run, as (description, query) pairs"""
+    return [
+        ('add_student: duplicate email', Student.query.filter_by(email='x@example.com')),
+        ('edit_student: email used by another student',
+         Student.query.filter(Student.email == 'x@example.com', Student.id != 1)),
+        ('add_teacher: duplicate email', Teacher.query.filter_by(email='x@example.com')),
+        ('edit_teacher: email used by another teacher',
+         Teacher.query.filter(Teacher.email == 'x@example.com', Teacher.id != 1)),
+        ('course.students (relationship load)', Student.query.filter_by(course_id=1)),
+        ('course.teachers (relationship load)', Teacher.query.filter_by(course_id=1)),
+    ]
+
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """Fail if any route lookup does a full table scan (run: flask --app <file> check-indexes)"""
+    init_db()
+    with app.app_context():
+        scans = 0
+        for description, query in index_checks():
+            sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+            plan = [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+            # "SEARCH student USING INDEX ..." is good, a plain "SCAN student" reads every row
+            scanned = [step for step in plan if step.startswith('SCAN') and 'INDEX' not in step]
+            scans += bool(scanned)
+            print(f"{'SCAN' if scanned else 'OK  '}  {description}: {'; '.join(plan)}")
+    if scans:
+        raise SystemExit(f'{scans} lookup(s) scan a whole table - add an index!')
+
+
+# =============================================================================
+# QUERY COUNT CHECK - a page must run the same number of queries for 1 row or many
+# =============================================================================
+
+def query_count_checks():
+    """Pages that list students / teachers with their course"""
+    return ['/', '/teachers']
+
+
+@contextmanager
+def scratch_database():
+    """Point db at an empty temporary SQLite file for the block - school.db is never touched"""
+    global _course_version, _email_registry
+    with app.app_context():
+        engines = db.engines  # {bind key: engine}, the same dict for every app context
+    real_engine = engines[None]
+    with tempfile.TemporaryDirectory() as folder:
+        engines[None] = create_engine(f"sqlite:///{os.path.join(folder, 'check.db')}")
+        _course_version += 1  # the course cache and email registry hold school.db data
+        _email_registry = None
+        try:
+            with app.app_context():
+                db.create_all()
+            yield
+        finally:
+            engines[None].dispose()  # close the file before the folder is deleted
+            engines[None] = real_engine
+            _course_version += 1
+            _email_registry = None
+
+
+def _add_check_rows(count, courses):
+    """count students and count teachers, spread over the given courses"""
+    with app.app_context():
+        for model in (Student, Teacher):
+            start = model.query.count()
+            db.session.add_all(
+                model(name=f'Check {start + i}', email=f'check-{start + i}@example.com', course=courses[i % len(courses)])
+                for i in range(count)
+            )
+        db.session.commit()
+
+
+@app.cli.command('check-queries')
+def check_queries_command():
+    """Fail if a page runs more queries for more rows (run: flask --app practice check-queries)"""
+    client = app.test_client()
+    urls = query_count_checks()
+
+    def count_each_page():
+        counts = []
+        for url in urls:
+            client.get(url)  # warm up the course cache / email registry first
+            with count_queries() as queries:
+                status = client.get(url).status_code
+            counts.append(len(queries) if status == 200 else None)  # None -> the page failed
+        return counts
+
+    # Requests run outside any app context of ours, so they get their own session
+    # (courses already loaded into ours would hide the lazy-load queries)
+    with scratch_database():
+        # 1️⃣ Small: 1 student and 1 teacher
+        _add_check_rows(1, [Course(name='Check course')])
+        small = count_each_page()
+
+        # 2️⃣ Large: a full page, every new row in a course of its own
+        _add_check_rows(DASHBOARD_PAGE_SIZE - 1, [Course(name=f'Check course {i}')
+                                                  for i in range(DASHBOARD_PAGE_SIZE - 1)])
+        large = count_each_page()
+
+    failed = growing = 0
+    for url, before, after in zip(urls, small, large):
+        if before is None or after is None:
+            failed += 1
+            print(f'ERR   {url}: the page did not return 200')
+            continue
+        grew = after > before
+        growing += grew
+        print(f"{'N+1 ' if grew else 'OK  '}  {url}: {before} -> {after} queries")
+    if failed:
+        raise SystemExit(f'{failed} page(s) failed to render - fix them before counting queries!')
+    if growing:
+        raise SystemExit(f'{growing} page(s) run more queries for more rows - eager-load the relationship!')
+
+
 # =============================================================================
 # CREATE TABLES AND ADD SAMPLE DATA
 # =============================================================================
@@ -425,6 +1047,8 @@ def init_db():
     """Create tables and add sample courses if empty"""
     with app.app_context():
         db.create_all()  # Create all tables based on models
+        migrate_indexes()  # create_all() never touches existing tables, so add new indexes here
+        print(f"SQLite pragmas ({app.config['SQLITE_PRAGMA_PROFILE']}):", effective_pragmas())
 
         # Add sample courses if none exist
         if Course.query.count() == 0:
@@ -437,6 +1061,8 @@ def init_db():
             db.session.commit()
             print('Sample courses added!')
 
+        print('Email registry:', get_email_registry().stats())  # build the Bloom filter at startup
+
 
 if __name__ == '__main__':
     init_db()
@@ -1,12 +1,36 @@
-from flask import Flask, request, jsonify , render_template
+from flask import Flask, request, jsonify , render_template, g
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from datetime import datetime
-from sqlalchemy import or_
+from datetime import datetime, date
+from sqlalchemy import or_, event, asc, desc, tuple_, func, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy.exc import IntegrityError
 import jwt
+import hashlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from itsdangerous import URLSafeSerializer, BadSignature
 from datetime import timedelta
 from functools import wraps
 import os
+import sqlite3
+import math
+import threading
+import time
+import json
+from urllib.parse import quote
+
+# Faster JSON encoders are optional - pip install orjson (or ujson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
 
 app = Flask(__name__)
 # DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///api_demo.db')
@@ -15,10 +39,112 @@ app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///api_demo.db'
 # app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = 'super-secret-key'
+app.config['SQLITE_PRAGMA_PROFILE'] = os.getenv('SQLITE_PRAGMA_PROFILE', 'fast')  # 'fast' or 'default'
+app.config['COUNT_CACHE_TTL'] = int(os.getenv('COUNT_CACHE_TTL', 60))  # seconds a ?count=estimate total is reused
+app.config['JSON_BACKEND'] = os.getenv('JSON_BACKEND', 'auto')  # 'auto', 'orjson', 'ujson' or 'json'
     
 db = SQLAlchemy(app)
 CORS(app)
 
+
+# =============================================================================
+# JSON PROVIDER - jsonify() through orjson / ujson when installed
+# =============================================================================
+# With 100 books per page, encoding the response is most of the CPU time of a
+# request. orjson is written in Rust, ujson in C; both are much faster than the
+# stdlib json module. datetime values are written as ISO 8601 strings, so
+# to_dict() can hand created_at over as it is.
+
+JSON_BACKENDS = {'orjson': orjson, 'ujson': ujson, 'json': json}
+
+
+def _json_default(o):
+    """Types the encoders don't know: dates as ISO 8601, the rest like Flask does"""
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()  # Flask's default would be an HTTP date ("Sun, 18 Oct ...")
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """app.json using the fastest installed encoder (or app.config['JSON_BACKEND'])"""
+
+    default = staticmethod(_json_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        name = app.config.get('JSON_BACKEND', 'auto')
+        if name == 'auto':
+            name = next(n for n in ('orjson', 'ujson', 'json') if JSON_BACKENDS[n] is not None)
+        if JSON_BACKENDS.get(name) is None:
+            raise RuntimeError(f"JSON_BACKEND={name!r} is not installed (use orjson, ujson or json)")
+        self.backend = name
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.get('indent')  # set by response() for pretty output in debug mode
+        if self.backend == 'orjson':
+            option = orjson.OPT_NON_STR_KEYS  # datetimes are handled natively
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        if self.backend == 'ujson':
+            return ujson.dumps(obj, default=self.default, sort_keys=self.sort_keys,
+                               indent=indent or 0, ensure_ascii=False)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson':
+            return orjson.loads(s)
+        if self.backend == 'ujson':
+            return ujson.loads(s)
+        return super().loads(s, **kwargs)
+
+
+app.json = FastJSONProvider(app)
+
+
+# =============================================================================
+# SQLITE PRAGMA PROFILES - applied to every new engine connection
+# =============================================================================
+
+SQLITE_PRAGMA_PROFILES = {
+    'default': {},  # SQLite's own settings (rollback journal, fsync on every commit)
+    'fast': {
+        'journal_mode': 'WAL',    # readers no longer wait behind writers
+        'synchronous': 'NORMAL',  # fsync at checkpoints instead of every commit (safe with WAL)
+        'mmap_size': 268435456,   # read the file through 256 MB of memory-mapped I/O
+        'cache_size': -64000,     # ~64 MB page cache (negative value = size in KiB)
+        'temp_store': 'MEMORY',   # temp tables and sorts stay in RAM
+        'busy_timeout': 5000,     # wait up to 5 s for a lock instead of failing at once
+    },
+}
+
+if app.config['SQLITE_PRAGMA_PROFILE'] not in SQLITE_PRAGMA_PROFILES:  # fail at startup, not on the first connection
+    raise RuntimeError(f"SQLITE_PRAGMA_PROFILE={app.config['SQLITE_PRAGMA_PROFILE']!r} is unknown "
+                       f"(use {' or '.join(SQLITE_PRAGMA_PROFILES)})")
+
+
+@event.listens_for(Engine, 'connect')
+def apply_pragmas(dbapi_connection, connection_record):
+    """Engine 'connect' event: run the selected profile on each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return  # PostgreSQL / MySQL -> nothing to do
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMA_PROFILES[app.config['SQLITE_PRAGMA_PROFILE']].items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def effective_pragmas():
+    """Read back what SQLite is actually using (printed at startup)"""
+    with db.engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in SQLITE_PRAGMA_PROFILES['fast']
+        }
+
+
 class Author(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -45,7 +171,13 @@ class Book(db.Model):
     isbn = db.Column(db.String(20), unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # foreign key
-    author_id = db.Column(db.Integer, db.ForeignKey('author.id'), nullable = False)
+    author_id = db.Column(db.Integer, db.ForeignKey('author.id'), nullable = False, index=True)
+
+    # Composite indexes: "ORDER BY year, id LIMIT 5" walks the index instead of sorting the whole table
+    __table_args__ = (
+        db.Index('ix_book_year_id', 'year', 'id'),
+        db.Index('ix_book_title_id', 'title', 'id'),
+    )
 
 
     # def to_dict(self):
@@ -63,7 +195,7 @@ class Book(db.Model):
         'title': self.title,
         'year': self.year,
         'isbn': self.isbn,
-        'created_at': self.created_at.isoformat() if self.created_at else None,
+        'created_at': self.created_at,  # the JSON provider writes it as ISO 8601
         'author': {
             'id': self.author.id,
             'name': self.author.name,
@@ -71,26 +203,340 @@ class Book(db.Model):
         } if self.author else None
     }
 
+def books_with_author():
+    """Book.query outer-joined to Author, with book.author filled from that same join.
+
+    Book.to_dict() reads book.author - loaded lazily that is one extra
+    "SELECT ... FROM author" per book on the page (the N+1 problem).
+    OUTER join: a book whose author row is missing still shows up (author: null).
+    """
+    return Book.query.outerjoin(Book.author).options(contains_eager(Book.author))
+
+
+BOOK_SORT_COLUMNS = {
+    'id': Book.id,
+    'title': Book.title,
+    'year': Book.year,
+    # '' for a book without an author (NULL would break cursor compares).
+    # No index can serve this: the sort key lives on the joined table -> SQLite sorts
+    'author': func.coalesce(Author.name, ''),
+}
+
+
+def book_sort_columns(sort_by):
+    """Columns to sort by for ?sort_by=id|title|year|author (unknown sort_by -> id)"""
+    column = BOOK_SORT_COLUMNS.get(sort_by, Book.id)
+    if column is Book.id:
+        return [Book.id]
+    return [column, Book.id]  # id breaks ties -> stable pages, matches the (x, id) indexes
+
+
+def book_sort_order(sort_by, order):
+    """ORDER BY for ?sort_by=...&order=asc|desc"""
+    direction = asc if order == 'asc' else desc
+    return [direction(column) for column in book_sort_columns(sort_by)]
+
+
+def book_sort_key(book, sort_by):
+    """The values of book_sort_columns() for one book - what a cursor remembers"""
+    author_name = book.author.name if book.author else ''  # same as the coalesce() in BOOK_SORT_COLUMNS
+    values = {'id': book.id, 'title': book.title, 'year': book.year, 'author': author_name}
+    return [values[sort_by]] + ([book.id] if sort_by != 'id' else [])
+
+
+# =============================================================================
+# CURSOR PAGINATION - opt-in with ?cursor= (page/limit stays for the frontend)
+# =============================================================================
+# OFFSET pagination reads and throws away every row before the page, so page 5000
+# is slower than page 1. A cursor remembers the sort key of the last row instead:
+# "WHERE (year, id) < (2018, 42) ORDER BY year DESC, id DESC LIMIT 5" is an index seek.
+
+cursor_signer = URLSafeSerializer(app.config['SECRET_KEY'], salt='page-cursor')
+
+PAGE_SIZE = 5        # default ?limit
+MAX_PAGE_SIZE = 100  # upper bound for ?limit so one page can never load the whole table
+
+
+def page_limit():
+    """?limit clamped to 1..MAX_PAGE_SIZE (SQLite reads LIMIT -1 as 'no limit')"""
+    return min(max(request.args.get('limit', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+
+
+def decode_cursor(token, kind):
+    """?cursor= value -> dict, None for the first page; raises BadSignature if tampered with"""
+    if not token:
+        return None
+    cursor = cursor_signer.loads(token)
+    if cursor.get('kind') != kind:  # a books cursor is no good for /api/author
+        raise BadSignature('cursor belongs to another endpoint')
+    return cursor
+
+
+def keyset_page(query, columns, key_of, order, limit, cursor=None, **state):
+    """One page of query after (or before) the cursor -> (items, next_cursor, prev_cursor)
+
+    columns: ORDER BY columns, the last one unique (id); key_of(item) -> their values.
+    state is signed into the returned cursors (e.g. sort_by) so it can't change mid-way.
+    """
+    backwards = cursor is not None and cursor['dir'] == 'prev'
+    ascending = (order == 'asc') != backwards  # walking backwards = flip the order
+    direction = asc if ascending else desc
+
+    if cursor is not None:
+        key, bound = tuple_(*columns), tuple_(*cursor['key'])
+        query = query.filter(key > bound if ascending else key < bound)
+
+    items = query.order_by(*[direction(c) for c in columns]).limit(limit + 1).all()
+    has_more = len(items) > limit  # one extra row tells us if another page exists
+    items = items[:limit]
+    if backwards:
+        items.reverse()
+
+    has_next = has_more if not backwards else True
+    has_prev = has_more if backwards else cursor is not None
+
+    def make(dir, item):
+        return cursor_signer.dumps({'dir': dir, 'key': key_of(item), 'order': order, **state})
+
+    next_cursor = make('next', items[-1]) if items and has_next else None
+    prev_cursor = make('prev', items[0]) if items and has_prev else None
+    return items, next_cursor, prev_cursor
+
+
+# =============================================================================
+# PAGE COUNTS - ?count=exact|estimate|none
+# =============================================================================
+# paginate() runs a second "SELECT count(*)" over the whole filtered join on
+# every page, just to fill total_pages / total_items.
+#   exact    -> that count, every time (default, the frontend shows the totals)
+#   estimate -> the count is cached per filter for COUNT_CACHE_TTL seconds and
+#               dropped as soon as a book or author is committed
+#   none     -> no count at all, has_more comes from fetching limit + 1 rows
+
+COUNT_CACHE_MAX = 1000  # distinct filter combinations kept at once
+
+_count_version = 0  # bumped after every commit that touches Book / Author
+_count_cache = {}   # cache key -> (total, version, loaded_at)
+_count_cache_lock = threading.Lock()
+
+
+@event.listens_for(Session, 'before_flush')
+def _note_count_changes(session, flush_context, instances):
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, (Book, Author)) for obj in changed):
+        session.info['counts_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_count_version(session):
+    global _count_version
+    if session.info.pop('counts_changed', False):
+        _count_version += 1  # every cached total is stale now
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_count_changes(session):
+    session.info.pop('counts_changed', None)
+
+
+def cached_count(query, key):
+    """query.count(), reused for the same key until a write or the TTL"""
+    with _count_cache_lock:
+        hit = _count_cache.get(key)
+        if hit and hit[1] == _count_version and time.monotonic() - hit[2] <= app.config['COUNT_CACHE_TTL']:
+            return hit[0]
+        version = _count_version  # read first, so a commit during the count isn't cached as current
+
+    total = query.order_by(None).count()
+
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX:
+            _count_cache.clear()
+        _count_cache[key] = (total, version, time.monotonic())
+    return total
+
+
+def paginate_counted(query, page, limit, count_mode, cache_key):
+    """page/limit pagination -> (items, page info) honouring ?count=exact|estimate|none"""
+    if count_mode not in ('estimate', 'none'):
+        pagination = query.paginate(page=page, per_page=limit, error_out=False)
+        return pagination.items, {
+            "total_pages": pagination.pages,
+            "total_items": pagination.total,
+            "has_more": pagination.has_next,
+        }
+
+    page = max(page, 1)                 # same clamping as paginate(error_out=False)
+    limit = limit if limit > 0 else 20
+    rows = query.limit(limit + 1).offset((page - 1) * limit).all()
+    info = {"total_pages": None, "total_items": None, "has_more": len(rows) > limit}
+
+    if count_mode == 'estimate':
+        total = cached_count(query, cache_key)
+        info["total_items"] = total
+        info["total_pages"] = math.ceil(total / limit)
+    return rows[:limit], info
+
+
+# =============================================================================
+# MULTI-GET - ?ids=1,2,3 on /api/books and /api/authors
+# =============================================================================
+# One IN (...) query for the whole list instead of one request per record.
+
+MULTI_GET_MAX_IDS = 100
+
+
+def parse_ids(raw):
+    """'3,1,3,2' -> [3, 1, 2] (request order, no repeats); None if not a list of numbers"""
+    try:
+        ids = [int(part) for part in raw.split(',') if part.strip()]
+    except ValueError:
+        return None
+    return list(dict.fromkeys(ids))
+
+
+def multi_get(raw_ids, query, key, name, to_dicts):
+    """JSON response for ?ids=: records in request order + the ids that weren't found
+
+    query must return every row of the model (outer joins only) - a row it
+    filters out would be reported as missing although it exists.
+    """
+    ids = parse_ids(raw_ids)
+    if not ids:
+        return jsonify({'success': False, 'error': 'ids must be a comma separated list of numbers'}), 400
+    if len(ids) > MULTI_GET_MAX_IDS:
+        return jsonify({'success': False, 'error': f'At most {MULTI_GET_MAX_IDS} ids per request'}), 400
+
+    found = {record.id: record for record in query.filter(key.in_(ids))}
+    return jsonify({
+        'success': True,
+        name: to_dicts([found[id] for id in ids if id in found]),
+        'missing': [id for id in ids if id not in found]
+    })
+
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(100), unique=True, nullable=False)
     password = db.Column(db.String(100), nullable=False)  # plain for now
 
 
+# =============================================================================
+# VERIFIED TOKEN CACHE - skip jwt.decode() for tokens we already checked
+# =============================================================================
+# The same token arrives on every request of a session. Once its signature is
+# verified, its claims can't change until it expires, so keep them (LRU, keyed by
+# a SHA-256 digest so raw tokens aren't held in memory) and check only "exp".
+
+TOKEN_CACHE_SIZE = 1024  # most recently used tokens kept
+
+
+class TokenCache:
+    """LRU of verified tokens: digest -> claims, each kept until its 'exp'"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.revoked = {}  # digest -> exp, so a revoked token isn't verified again
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        """Cached claims, or None if the token has to be verified"""
+        key, now = self.digest(token), time.time()
+        with self.lock:
+            claims = self.entries.get(key)
+            if claims is not None and claims['exp'] > now:
+                self.entries.move_to_end(key)  # most recently used
+                self.hits += 1
+                return claims
+            self.entries.pop(key, None)  # expired
+            self.misses += 1
+            return None
+
+    def put(self, token, claims):
+        if 'exp' not in claims:
+            return  # no expiry -> nothing tells us when to drop it, verify every time
+        key = self.digest(token)
+        with self.lock:
+            self.entries[key] = claims
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)  # evict the least recently used
+
+    def revoke(self, token, exp):
+        """Forget the token and refuse it from now on, until it would have expired anyway"""
+        key, now = self.digest(token), time.time()
+        with self.lock:
+            self.entries.pop(key, None)
+            self.revoked = {k: e for k, e in self.revoked.items() if e > now}  # drop expired ones
+            self.revoked[key] = exp
+
+    def is_revoked(self, token):
+        with self.lock:
+            return self.digest(token) in self.revoked
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'revoked': len(self.revoked),
+            }
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
+def revoke_token(token, claims=None):
+    """Revocation hook - call on logout / password change with the raw token"""
+    if claims is None:
+        try:
+            claims = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+        except jwt.InvalidTokenError:
+            return  # invalid or expired already - nothing to revoke
+    token_cache.revoke(token, claims.get('exp', time.time() + 86400))
+
+
 def token_required(f):
+    """Reject requests without a valid 'Authorization: Bearer <token>'; claims go to g.token_claims"""
     @wraps(f)
     def wrapper(*args, **kwargs):
-        token = request.headers.get('Authorization')
+        header = request.headers.get('Authorization')
 
-        if not token:
+        if not header:
             return jsonify({'error': 'Token missing'}), 401
 
-        try:
-            token = token.split()[1]
-            jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        except:
+        parts = header.split()
+        if len(parts) != 2:
             return jsonify({'error': 'Invalid token'}), 401
-
+        token = parts[1]
+
+        if token_cache.is_revoked(token):
+            return jsonify({'error': 'Token revoked'}), 401
+
+        claims = token_cache.get(token)
+        if claims is None:
+            try:
+                claims = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            except jwt.ExpiredSignatureError:
+                return jsonify({'error': 'Token expired'}), 401
+            except jwt.InvalidTokenError:
+                return jsonify({'error': 'Invalid token'}), 401
+            token_cache.put(token, claims)
+
+        g.token = token
+        g.token_claims = claims  # handlers read the claims here, no second decode
+        g.user_id = claims.get('user_id')
         return f(*args, **kwargs)
     return wrapper
 
@@ -118,18 +564,35 @@ def login():
     })
 
 
+@app.route('/api/logout', methods=['POST'])
+@token_required
+def logout():
+    revoke_token(g.token, g.token_claims)
+    return jsonify({'success': True, 'message': 'Logged out'})
+
+
+@app.route('/api/stats/token-cache', methods=['GET'])
+def token_cache_stats():
+    """Size and hit rate of the verified-token cache"""
+    return jsonify(token_cache.stats())
+
+
 
 
 @app.route('/api/books', methods=['GET'])
 def get_books():
+    if 'ids' in request.args:  # multi-get: one query, authors outer-joined in (a book without one isn't 'missing')
+        return multi_get(request.args['ids'], books_with_author(), Book.id, 'books',
+                         lambda books: [book.to_dict() for book in books])
+
     page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 5, type=int)
+    limit = page_limit()
 
     title = request.args.get('title')
     year = request.args.get('year')
     author = request.args.get('author')
 
-    query = Book.query.join(Author)
+    query = books_with_author()
 
     if title:
         query = query.filter(Book.title.ilike(f"%{title}%"))
@@ -140,36 +603,47 @@ def get_books():
     if author:
         query = query.filter(Author.name.ilike(f"%{author}%"))
 
-    pagination = query.order_by(Book.id.desc()).paginate(
-        page=page,
-        per_page=limit,
-        error_out=False
-    )
-
-    #drh
-    # 🔹 SORTING PARAMS
+    # 🔹 SORTING PARAMS (default: newest first)
     sort_by = request.args.get("sort_by", "id")
-    order = request.args.get("order", "asc")
-
-    query = Book.query
-
-    # 🔹 APPLY SORTING
-    if sort_by == "title":
-        query = query.order_by(Book.title.asc() if order == "asc" else Book.title.desc())
+    order = request.args.get("order", "desc")
 
-    elif sort_by == "year":
-        query = query.order_by(Book.year.asc() if order == "asc" else Book.year.desc())
-
-    elif sort_by == "id":
-        query = query.order_by(Book.id.asc() if order == "asc" else Book.id.desc())
+    # 🔹 CURSOR MODE (?cursor= for the first page, then the returned next_cursor / prev_cursor)
+    if 'cursor' in request.args:
+        try:
+            cursor = decode_cursor(request.args['cursor'], 'books')
+        except BadSignature:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        if cursor is not None:
+            sort_by, order = cursor['sort_by'], cursor['order']  # a cursor keeps the sort it started with
+        if sort_by not in BOOK_SORT_COLUMNS:
+            sort_by = 'id'
+
+        books, next_cursor, prev_cursor = keyset_page(
+            query, book_sort_columns(sort_by), lambda b: book_sort_key(b, sort_by),
+            order, limit, cursor, kind='books', sort_by=sort_by
+        )
+        return jsonify({
+            "success": True,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "books": [book.to_dict() for book in books]
+        })
+
+    # 🔹 APPLY SORTING to the paginated query
+    query = query.order_by(*book_sort_order(sort_by, order))
+
+    # 🔹 COUNT MODE (exact | estimate | none)
+    count_mode = request.args.get("count", "exact")
+    books, page_info = paginate_counted(
+        query, page, limit, count_mode, cache_key=('books', title, year, author)
+    )
 
-    #drh
     return jsonify({
         "success": True,
         "page": page,
-        "total_pages": pagination.pages,
-        "total_items": pagination.total,
-        "books": [book.to_dict() for book in pagination.items]
+        **page_info,
+        "books": [book.to_dict() for book in books]
     })
 
 
@@ -194,7 +668,7 @@ def get_books():
 
 @app.route('/api/books/<int:id>', methods=['GET'])
 def get_book(id):
-    book = Book.query.get(id)
+    book = Book.query.options(joinedload(Book.author)).get(id)
 
     if not book:
         return jsonify({
@@ -247,7 +721,7 @@ def create_book():
 # PUT /api/books/<id> - Update book
 @app.route('/api/books/<int:id>', methods=['PUT'])
 def update_book(id):
-    book = Book.query.get(id)
+    book = Book.query.options(joinedload(Book.author)).get(id)
 
     if not book:
         return jsonify({'success': False, 'error': 'Book not found'}), 404
@@ -333,7 +807,7 @@ def delete_book(id):
 
 @app.route('/api/books/search', methods=['GET'])
 def search_books():
-    query = Book.query
+    query = books_with_author()
 
     # 🔍 Search by book title
     title = request.args.get('q')
@@ -348,7 +822,7 @@ def search_books():
     # 👤 Search by author name (JOIN)
     author_name = request.args.get('author')
     if author_name:
-        query = query.join(Author).filter(
+        query = query.filter(
             Author.name.ilike(f'%{author_name}%')
         )
 
@@ -362,6 +836,63 @@ def search_books():
 
 
 
+# =============================================================================
+# DASHBOARD STATS - GET /api/stats
+# =============================================================================
+# Everything the stats cards need from a few GROUP BY queries, cached until the
+# next book/author commit (same _count_version as ?count=estimate) or the TTL.
+
+TOP_AUTHORS = 5
+
+_stats_cache = {'version': None, 'loaded_at': 0.0, 'stats': None}
+_stats_cache_lock = threading.Lock()
+
+
+def compute_stats():
+    """Totals, books per year and the authors with the most books"""
+    per_year = (
+        db.session.query(Book.year, func.count(Book.id))
+        .group_by(Book.year)
+        .order_by(Book.year)  # ix_book_year_id already has the years in order
+        .all()
+    )
+    top_authors = (
+        db.session.query(Author.id, Author.name, func.count(Book.id).label('books_count'))
+        .join(Book, Book.author_id == Author.id)
+        .group_by(Author.id)
+        .order_by(desc('books_count'), Author.id)
+        .limit(TOP_AUTHORS)
+        .all()
+    )
+    return {
+        'total_books': sum(count for _, count in per_year),
+        'total_authors': Author.query.count(),
+        'distinct_years': len(per_year),
+        'books_per_year': [{'year': year, 'count': count} for year, count in per_year],
+        'top_authors': [
+            {'id': id, 'name': name, 'books_count': books_count}
+            for id, name, books_count in top_authors
+        ],
+    }
+
+
+def cached_stats():
+    """compute_stats(), only re-run after a book/author change"""
+    with _stats_cache_lock:
+        expired = time.monotonic() - _stats_cache['loaded_at'] > app.config['COUNT_CACHE_TTL']
+        if _stats_cache['version'] != _count_version or expired:
+            version = _count_version  # read first, so a commit during the queries forces another reload
+            _stats_cache['stats'] = compute_stats()
+            _stats_cache['version'] = version
+            _stats_cache['loaded_at'] = time.monotonic()
+        return _stats_cache['stats']
+
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    return jsonify({'success': True, **cached_stats()})
+
+
 # =============================================================================
 # SIMPLE WEB PAGE FOR TESTING
 # =============================================================================
@@ -453,21 +984,54 @@ curl -X DELETE http://localhost:5000/api/books/1
 #         'count': len(authors),
 #         'authors': [author.to_dict() for author in authors]  # ✅ correct key
 #     })
+def authors_with_book_counts(authors):
+    """author.to_dict() + 'books_count', counted in SQL with one GROUP BY for the whole page"""
+    ids = [author.id for author in authors]
+    counts = dict(
+        db.session.query(Book.author_id, func.count(Book.id))
+        .filter(Book.author_id.in_(ids))
+        .group_by(Book.author_id)  # served from the book.author_id index
+        .all()
+    ) if ids else {}
+    return [{**author.to_dict(), 'books_count': counts.get(author.id, 0)} for author in authors]
+
+
 @app.route("/api/author" , methods = ['GET'])
+@app.route('/api/authors', methods=['GET'])
 def get_authors():
+    if 'ids' in request.args:  # multi-get, books_count included like the list
+        return multi_get(request.args['ids'], Author.query, Author.id, 'authors', authors_with_book_counts)
+
     page = request.args.get("page", 1, type=int)   # this two lines are for pagination
-    limit = request.args.get("limit", 5, type=int)
+    limit = page_limit()
 
-    pagination = Author.query.paginate(page=page, per_page=limit, error_out=False)
-    a = Author.query.all()
-    authors = [author.to_dict() for author in pagination.items]
+    if 'cursor' in request.args:  # cursor mode, ordered by id
+        try:
+            cursor = decode_cursor(request.args['cursor'], 'authors')
+        except BadSignature:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        authors, next_cursor, prev_cursor = keyset_page(
+            Author.query, [Author.id], lambda a: [a.id], 'asc', limit, cursor, kind='authors'
+        )
+        return jsonify({
+            "success": True,
+            "authors": authors_with_book_counts(authors),
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
+        })
+
+    count_mode = request.args.get("count", "exact")
+    items, page_info = paginate_counted(
+        Author.query, page, limit, count_mode, cache_key=('authors',)
+    )
+    authors = authors_with_book_counts(items)
 
     return jsonify({
         "success": True,
         "authors": authors,
-        "page": pagination.page,
-        "total_pages": pagination.pages,
-        "total_items": pagination.total
+        "page": max(page, 1),
+        **page_info
     })
 
 
@@ -560,6 +1124,206 @@ def delete_author(id):
     })
 
 
+# =============================================================================
+# BATCH WRITES - POST /api/books/batch and /api/authors/batch
+# =============================================================================
+# Body: a list of operations (or {"operations": [...]}):
+#   {"op": "create", "data": {...}}
+#   {"op": "update", "id": 5, "data": {...}}
+#   {"op": "delete", "id": 7}
+# Checks run once per batch with IN (...) queries instead of once per row, and
+# every valid operation is saved with a single commit. Invalid ones are skipped
+# and reported in "results" next to their index.
+
+BATCH_MAX_OPERATIONS = 10000
+SQL_IN_LIMIT = 900  # Max values per IN (...) so we stay under SQLite's variable limit
+
+# field -> accepted JSON types; fields that accept None treat "" as None (no ISBN)
+BATCH_FIELDS = {
+    Book: {
+        'fields': {'title': str, 'year': int, 'isbn': (str, type(None)), 'author_id': int},
+        'required': ('title', 'year', 'author_id'),
+    },
+    Author: {
+        'fields': {'name': str, 'bio': str, 'city': str},
+        'required': ('name', 'bio', 'city'),
+    },
+}
+
+
+def _clean_fields(data, fields):
+    """Known fields of data with "" -> None where allowed, or an error message for a wrong type"""
+    cleaned = {}
+    for field, value in data.items():
+        if field not in fields:
+            continue
+        types = fields[field]
+        if value == '' and isinstance(None, types):
+            value = None  # "" would still clash in a UNIQUE column
+        if not isinstance(value, types) or isinstance(value, bool):  # bool is an int subclass
+            return None, f'{field} has the wrong type'
+        cleaned[field] = value
+    return cleaned, None
+
+
+def _in_chunks(column, values, *entities):
+    """query(*entities).filter(column IN values), SQL_IN_LIMIT values at a time"""
+    values = list(values)
+    for start in range(0, len(values), SQL_IN_LIMIT):
+        yield from db.session.query(*entities).filter(column.in_(values[start:start + SQL_IN_LIMIT]))
+
+
+def _read_batch():
+    """The operations list from the JSON body, or None"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('operations')
+    return data if isinstance(data, list) else None
+
+
+def apply_batch(model, operations, check):
+    """Run create / update / delete operations on model in one transaction.
+
+    check(creates, updates, deletes) -> {index: error} for the model's own
+    set-based checks; creates = [(index, data)], updates = [(index, obj, data)],
+    deletes = [(index, obj)].
+    """
+    fields, required = BATCH_FIELDS[model]['fields'], BATCH_FIELDS[model]['required']
+    errors = {}
+    parsed = []
+
+    # 1️⃣ Shape checks (no database needed)
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        data = operation.get('data', {}) if op else None
+        if op not in ('create', 'update', 'delete'):
+            errors[index] = 'op must be create, update or delete'
+        elif not isinstance(data, dict):
+            errors[index] = 'data must be an object'
+        elif op != 'create' and not isinstance(operation.get('id'), int):
+            errors[index] = 'id is required'
+        elif op == 'create' and any(data.get(field) in (None, '') for field in required):
+            errors[index] = f"{', '.join(required)} are required"
+        elif op == 'update' and any(data.get(field) in (None, '') for field in required if field in data):
+            errors[index] = f"{', '.join(required)} can't be empty"
+        else:
+            data, error = _clean_fields(data, fields)
+            if error:
+                errors[index] = error
+            else:
+                parsed.append((index, op, operation.get('id'), data))
+
+    # 2️⃣ Load every update / delete target with one IN query
+    target_ids = [id for _, op, id, _ in parsed if op != 'create']
+    targets = {obj.id: obj for obj in _in_chunks(model.id, set(target_ids), model)}
+    creates, updates, deletes, used_ids = [], [], [], set()
+    for index, op, id, data in parsed:
+        if op == 'create':
+            creates.append((index, data))
+        elif id not in targets:
+            errors[index] = f'{model.__name__} {id} not found'
+        elif id in used_ids:
+            errors[index] = f'{model.__name__} {id} appears twice in this batch'
+        else:
+            used_ids.add(id)
+            (updates.append((index, targets[id], data)) if op == 'update'
+             else deletes.append((index, targets[id])))
+
+    # 3️⃣ Model-specific set-based checks (foreign keys, unique columns)
+    errors.update(check(creates, updates, deletes))
+
+    # 4️⃣ Apply everything that passed, then commit once
+    creates = [(index, data) for index, data in creates if index not in errors]
+    updates = [(index, obj, data) for index, obj, data in updates if index not in errors]
+    deletes = [(index, obj) for index, obj in deletes if index not in errors]
+    done = []
+    try:
+        if creates:
+            # one INSERT ... RETURNING id statement for all rows - no ORM object per row
+            statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+            new_ids = db.session.scalars(statement, [data for _, data in creates]).all()
+            done += [(index, 'create', id) for (index, _), id in zip(creates, new_ids)]
+            db.session.info['counts_changed'] = True  # bulk inserts skip the before_flush event
+        for index, obj, data in updates:
+            for field, value in data.items():
+                setattr(obj, field, value)
+            done.append((index, 'update', obj.id))
+        for index, obj in deletes:
+            db.session.delete(obj)
+            done.append((index, 'delete', obj.id))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        # nothing was saved - every operation that got this far failed, even if its statement never ran
+        pending = [index for index, _ in creates] + [index for index, _, _ in updates] + [index for index, _ in deletes]
+        errors.update({index: 'Database error, batch not saved' for index in pending})
+        done = []
+
+    results = [{'index': index, 'op': op, 'id': id, 'success': True} for index, op, id in done]
+    results += [{'index': index, 'success': False, 'error': error} for index, error in errors.items()]
+    results.sort(key=lambda result: result['index'])
+    return results
+
+
+def _check_book_batch(creates, updates, deletes):
+    """Author ids must exist, ISBNs must be unique (in the table and in this batch)"""
+    errors = {}
+    rows = [(index, None, data) for index, data in creates] + updates
+
+    author_ids = {data['author_id'] for _, _, data in rows if 'author_id' in data}
+    known_authors = {id for (id,) in _in_chunks(Author.id, author_ids, Author.id)}
+
+    isbns = {data['isbn'] for _, _, data in rows if data.get('isbn') is not None}
+    isbn_owner = dict(_in_chunks(Book.isbn, isbns, Book.isbn, Book.id))  # isbn -> id of the book that has it
+    seen_isbns = set()
+
+    for index, book, data in rows:
+        isbn = data.get('isbn')
+        if 'author_id' in data and data['author_id'] not in known_authors:
+            errors[index] = f"Invalid author_id {data['author_id']}"
+        elif isbn is not None and isbn in seen_isbns:
+            errors[index] = 'ISBN repeated in this batch'
+        elif isbn is not None and isbn_owner.get(isbn, book.id if book else None) != (book.id if book else None):
+            errors[index] = 'ISBN already exists'
+        elif isbn is not None:
+            seen_isbns.add(isbn)
+    return errors
+
+
+def _check_author_batch(creates, updates, deletes):
+    """An author can only be deleted once they have no books"""
+    ids = {author.id for _, author in deletes}
+    with_books = {id for (id,) in _in_chunks(Book.author_id, ids, Book.author_id)}
+    return {index: 'Author still has books' for index, author in deletes if author.id in with_books}
+
+
+def run_batch(model, check):
+    """Shared body of the two batch routes"""
+    operations = _read_batch()
+    if operations is None:
+        return jsonify({'success': False, 'error': 'Send a JSON list of operations'}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({'success': False, 'error': f'At most {BATCH_MAX_OPERATIONS} operations per batch'}), 400
+
+    results = apply_batch(model, operations, check)
+    return jsonify({
+        'success': True,
+        'applied': sum(result['success'] for result in results),
+        'failed': sum(not result['success'] for result in results),
+        'results': results
+    })
+
+
+@app.route('/api/books/batch', methods=['POST'])
+def books_batch():
+    return run_batch(Book, _check_book_batch)
+
+
+@app.route('/api/authors/batch', methods=['POST'])
+def authors_batch():
+    return run_batch(Author, _check_author_batch)
+
+
 
 # def init_db():
 #     with app.app_context():
@@ -595,9 +1359,113 @@ def delete_author(id):
 #             db.session.add_all([b1, b2, b3])
 #             db.session.commit()
 
+# =============================================================================
+# QUERY COUNT CHECK - catches N+1 regressions
+# =============================================================================
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement run inside the block:
+
+        with count_queries() as queries:
+            app.test_client().get('/api/books?limit=50')
+        print(len(queries))   # same number for 1 book or 50
+    """
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def query_count_checks():
+    """(small URL, large URL) pairs - both must run the same number of queries"""
+    first = db.session.query(Book.title).order_by(Book.id).first()
+    one_title = first.title if first else ''
+    return [
+        ('/api/books?limit=1', '/api/books?limit=50'),
+        ('/api/books?limit=1&count=none', '/api/books?limit=50&count=none'),
+        ('/api/books?limit=1&cursor=', '/api/books?limit=50&cursor='),
+        (f'/api/books/search?q={quote(one_title)}', '/api/books/search'),
+        ('/api/author?limit=1', '/api/author?limit=50'),
+    ]
+
+
+@app.cli.command('check-queries')
+def check_queries_command():
+    """Fail if a list endpoint runs more queries for more rows (run: flask --app practice check-queries)"""
+    init_db()
+    with app.app_context():
+        checks = query_count_checks()
+        authors = db.session.query(Book.author_id).distinct().count()
+    if authors < 2:
+        print('Warning: books from at least 2 authors are needed to spot an N+1')
+
+    client = app.test_client()
+    growing = 0
+    for small, large in checks:
+        with count_queries() as small_queries:
+            client.get(small)
+        with count_queries() as large_queries:
+            client.get(large)
+        grew = len(large_queries) > len(small_queries)
+        growing += grew
+        print(f"{'N+1 ' if grew else 'OK  '}  {large}: {len(small_queries)} -> {len(large_queries)} queries")
+    if growing:
+        raise SystemExit(f'{growing} endpoint(s) run more queries for more rows - eager-load the relationship!')
+
+
+@app.cli.command('bench-json')
+def bench_json_command():
+    """Books serialized per second by each installed JSON backend (run: flask --app practice bench-json)"""
+    authors = [Author(id=i, name=f'Author {i}', bio='bio', city='City') for i in range(1, 51)]
+    for size in (1000, 10000):
+        books = [
+            Book(id=i, title=f'Book number {i}', year=1950 + i % 70, isbn=f'isbn-{i}',
+                 created_at=datetime(2024, 1, 1, 12, 0, i % 60), author=authors[i % 50])
+            for i in range(size)
+        ]
+        payload = {'success': True, 'books': [book.to_dict() for book in books]}
+        for name, module in JSON_BACKENDS.items():
+            if module is None:
+                print(f'{name:7} not installed')
+                continue
+            app.config['JSON_BACKEND'] = name
+            provider = FastJSONProvider(app)
+            runs = max(1, 50000 // size)
+            started = time.perf_counter()
+            for _ in range(runs):
+                # encoding only - to_dict() costs the same for every backend. Compact separators
+                # (as response() uses) so json writes the same bytes as orjson / ujson
+                body = provider.dumps(payload, separators=(',', ':'))
+            seconds = (time.perf_counter() - started) / runs
+            print(f'{name:7} {size:>6} books: {seconds * 1000:7.1f} ms  '
+                  f'{size / seconds:>10,.0f} books/s  {len(body) / 1024:,.0f} KiB')
+
+
+RETIRED_INDEXES = ['ix_author_name_id']  # never used by a query plan, only slowed down writes
+
+
+def migrate_indexes():
+    """Create every index declared on the models that an older api_demo.db is missing"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)  # checkfirst -> skip if it already exists
+    with db.engine.begin() as conn:
+        for name in RETIRED_INDEXES:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS {name}')
+
+
 def init_db():
     with app.app_context():
         db.create_all()
+        migrate_indexes()  # create_all() never touches existing tables, so add new indexes here
+        print(f"SQLite pragmas ({app.config['SQLITE_PRAGMA_PROFILE']}):", effective_pragmas())
         if Author.query.count() == 0:
             a1 = Author(name='Durgesh', city='Chandwad', bio='Backend Developer')
             a2 = Author(name='Harshal', city='Sambhajinagar', bio='Python Enthusiast')
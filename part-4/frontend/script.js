@@ -100,20 +100,17 @@ function loadBooks() {
 }
 
 // ================= STATS =================
-fetch(`${BASE_URL}/api/books?limit=100`)
-    .then(res => res.json())
-    .then(data => {
-        if (!data.success) return;
-        const years = new Set(data.books.map(b => b.year));
-        document.getElementById("publishedYears").textContent = years.size;
-    });
-
-fetch(`${BASE_URL}/api/author`)  //here i change to author -> authors
-    .then(res => res.json())
-    .then(data => {
-        if (!data.success) return;
-        document.getElementById("totalAuthors").textContent = data.total_items;
-    });
+// one small request - the server counts, instead of downloading books to count here
+function loadStats() {
+    fetch(`${BASE_URL}/api/stats`)
+        .then(res => res.json())
+        .then(data => {
+            if (!data.success) return;
+            document.getElementById("totalAuthors").textContent = data.total_authors;
+            document.getElementById("publishedYears").textContent = data.distinct_years;
+        })
+        .catch(err => console.error("Stats error:", err));
+}
 
 // ================= AUTHOR DROPDOWN =================
 function loadAuthorDropdown() {
@@ -174,27 +171,20 @@ function loadAuthorDropdown() {
 
 // ================= AUTHORS TABLE =================
 function loadAuthorsTable() {
-    Promise.all([
-        fetch(`${BASE_URL}/api/author?page=${authorCurrentPage}&limit=${authorLimit}`)
-            .then(res => res.json()),
-        fetch(`${BASE_URL}/api/books?limit=100`)
-            .then(res => res.json())
-    ])
-    .then(([authorsData, booksData]) => {
-        if (!authorsData.success || !booksData.success) return;
+    // books_count comes from the API - no need to download every book and count here
+    fetch(`${BASE_URL}/api/author?page=${authorCurrentPage}&limit=${authorLimit}`)
+    .then(res => res.json())
+    .then(authorsData => {
+        if (!authorsData.success) return;
 
         authorsTableBody.innerHTML = "";
 
         authorsData.authors.forEach(author => {
-            const count = booksData.books.filter(
-                book => book.author && book.author.id === author.id
-            ).length;
-
             const row = document.createElement("tr");
             row.innerHTML = `
                 <td>${author.name}</td>
                 <td>${author.city}</td>
-                <td>${count}</td>
+                <td>${author.books_count}</td>
                 <td>
                     <button onclick="editAuthor(${author.id})">Edit</button>
                     <button onclick="deleteAuthor(${author.id})">Delete</button>
@@ -258,6 +248,7 @@ addBookBtn.addEventListener("click", () => {
 
         loadBooks();
         loadAuthorsTable();
+        loadStats();
     })
     .catch(err => console.error("Add/Update book error:", err));
 });
@@ -304,6 +295,7 @@ addAuthorBtn.addEventListener("click", () => {
 
         loadAuthorDropdown();
         loadAuthorsTable();
+        loadStats();
     })
     .catch(err => console.error("Add/Update author error:", err));
 });
@@ -319,6 +311,7 @@ function deleteBook(id) {
         .then(() => {
             loadBooks();
             loadAuthorsTable();
+            loadStats();
         });
 }
 
@@ -331,6 +324,7 @@ function deleteAuthor(id) {
         .then(() => {
             loadAuthorDropdown();
             loadAuthorsTable();
+            loadStats();
         })
         .catch(err => console.error("Delete author error:", err));
 }
@@ -440,3 +434,4 @@ authorNext.onclick = () => {
 loadAuthorDropdown();
 loadAuthorsTable();
 loadBooks();
+loadStats();
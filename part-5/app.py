@@ -15,8 +15,11 @@ Install: pip install psycopg2-binary pymysql python-dotenv
 """
 
 import os
+import sqlite3
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from dotenv import load_dotenv  # Load .env file
 
 # Load environment variables from .env file
@@ -43,8 +46,51 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True,  # Check connection validity before using
 }
 
+# SQLite speed settings (ignored for PostgreSQL/MySQL)
+app.config['SQLITE_PRAGMA_PROFILE'] = os.getenv('SQLITE_PRAGMA_PROFILE', 'fast')  # 'fast' or 'default'
+
 db = SQLAlchemy(app)
 
+# =============================================================================
+# SQLITE PRAGMA PROFILES - applied to every new engine connection
+# =============================================================================
+
+SQLITE_PRAGMA_PROFILES = {
+    'default': {},  # SQLite's own settings (rollback journal, fsync on every commit)
+    'fast': {
+        'journal_mode': 'WAL',    # readers no longer wait behind writers
+        'synchronous': 'NORMAL',  # fsync at checkpoints instead of every commit (safe with WAL)
+        'mmap_size': 268435456,   # read the file through 256 MB of memory-mapped I/O
+        'cache_size': -64000,     # ~64 MB page cache (negative value = size in KiB)
+        'temp_store': 'MEMORY',   # temp tables and sorts stay in RAM
+        'busy_timeout': 5000,     # wait up to 5 s for a lock instead of failing at once
+    },
+}
+
+if app.config['SQLITE_PRAGMA_PROFILE'] not in SQLITE_PRAGMA_PROFILES:  # fail at startup, not on the first connection
+    raise RuntimeError(f"SQLITE_PRAGMA_PROFILE={app.config['SQLITE_PRAGMA_PROFILE']!r} is unknown "
+                       f"(use {' or '.join(SQLITE_PRAGMA_PROFILES)})")
+
+
+@event.listens_for(Engine, 'connect')
+def apply_pragmas(dbapi_connection, connection_record):
+    """Engine 'connect' event: run the selected profile on each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return  # PostgreSQL / MySQL -> nothing to do
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMA_PROFILES[app.config['SQLITE_PRAGMA_PROFILE']].items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def effective_pragmas():
+    """Read back what SQLite is actually using (printed at startup)"""
+    with db.engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in SQLITE_PRAGMA_PROFILES['fast']
+        }
+
 
 # =============================================================================
 # MODEL
@@ -115,6 +161,8 @@ def init_db():
     with app.app_context():
         db.create_all()
         print(f'Database initialized! Using: {DATABASE_URL}')
+        if db.engine.dialect.name == 'sqlite':
+            print(f"SQLite pragmas ({app.config['SQLITE_PRAGMA_PROFILE']}):", effective_pragmas())
 
         if Product.query.count() == 0:
             sample = [